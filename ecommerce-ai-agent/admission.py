@@ -0,0 +1,203 @@
+"""Admission control in front of search_products
+
+Each client gets its own token bucket, and at most SEARCH_SLOTS searches
+scrape at once. Searches beyond that wait in a bounded queue where freed
+slots are handed out round-robin across clients, so one client's backlog
+cannot starve everyone else. When a client is over its rate or the queue
+is full the search is rejected at once with a Retry-After hint.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from rate_limit import HostRateLimiter
+
+# Searches allowed to scrape concurrently
+SEARCH_SLOTS = int(os.environ.get('SEARCH_SLOTS', '4'))
+# Searches allowed to wait for a slot, in total and per client
+SEARCH_QUEUE_SIZE = int(os.environ.get('SEARCH_QUEUE_SIZE', '32'))
+SEARCH_QUEUE_PER_CLIENT = int(os.environ.get('SEARCH_QUEUE_PER_CLIENT', '2'))
+# A queued search gives up after this many seconds
+SEARCH_QUEUE_WAIT = float(os.environ.get('SEARCH_QUEUE_WAIT', '30'))
+# Sustained searches per second and burst allowed to each client
+CLIENT_RATE = float(os.environ.get('CLIENT_RATE', '0.2'))
+CLIENT_BURST = float(os.environ.get('CLIENT_BURST', '5'))
+# Product detail-page fetches per second and burst allowed to each client (cached details are free)
+DETAIL_CLIENT_RATE = float(os.environ.get('DETAIL_CLIENT_RATE', '1'))
+DETAIL_CLIENT_BURST = float(os.environ.get('DETAIL_CLIENT_BURST', '10'))
+# Identify clients by the first X-Forwarded-For hop (only behind a trusted proxy)
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', '0') == '1'
+
+# Client buckets are pruned once there are this many
+CLIENT_BUCKETS_PRUNE_AT = 10000
+
+
+class Rejected(Exception):
+    """A search was refused admission; retry_after is a whole number of seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+def client_id(remote_addr, headers=None):
+    """Key a request is rate limited and queued under"""
+    if TRUST_PROXY_HEADERS and headers is not None:
+        forwarded = headers.get('X-Forwarded-For', '')
+        if forwarded.strip():
+            return forwarded.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+
+class _Ticket:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class FairScheduler:
+    """Concurrency slots with a bounded wait queue served round-robin per client"""
+
+    def __init__(self, slots=SEARCH_SLOTS, max_queue=SEARCH_QUEUE_SIZE,
+                 max_per_client=SEARCH_QUEUE_PER_CLIENT, max_wait=SEARCH_QUEUE_WAIT):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.free = slots
+        # client -> waiting tickets; order of keys is the round-robin order
+        self.waiting = OrderedDict()
+        self.queued = 0
+        # Recent search duration, for Retry-After estimates
+        self.avg_seconds = 5.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _retry_after(self):
+        return self.avg_seconds * (self.queued + 1) / max(self.slots, 1)
+
+    def acquire(self, client):
+        """Take a slot, waiting in the fair queue if needed; raises Rejected"""
+        with self.lock:
+            if self.free > 0 and not self.queued:
+                self.free -= 1
+                self.admitted += 1
+                return
+            tickets = self.waiting.get(client)
+            if self.queued >= self.max_queue or (tickets and len(tickets) >= self.max_per_client):
+                self.rejected += 1
+                raise Rejected('Too many searches in progress, please retry shortly', self._retry_after())
+            ticket = _Ticket()
+            self.waiting.setdefault(client, deque()).append(ticket)
+            self.queued += 1
+
+        if ticket.event.wait(self.max_wait):
+            return
+        with self.lock:
+            if ticket.granted:
+                # Granted just as the wait ran out
+                return
+            tickets = self.waiting.get(client)
+            if tickets is not None:
+                tickets.remove(ticket)
+                if not tickets:
+                    del self.waiting[client]
+            self.queued -= 1
+            self.timed_out += 1
+            raise Rejected('Search queue wait timed out, please retry shortly', self._retry_after())
+
+    def release(self, seconds=None):
+        """Give the slot to the next waiting client in round-robin order, or free it"""
+        with self.lock:
+            if seconds is not None:
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+            if self.waiting:
+                client, tickets = self.waiting.popitem(last=False)
+                ticket = tickets.popleft()
+                if tickets:
+                    # Client goes to the back of the rotation
+                    self.waiting[client] = tickets
+                self.queued -= 1
+                self.admitted += 1
+                ticket.granted = True
+                ticket.event.set()
+                return
+            self.free += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'slots': self.slots,
+                'busy': self.slots - self.free,
+                'queued': self.queued,
+                'waiting_clients': len(self.waiting),
+                'avg_seconds': round(self.avg_seconds, 2),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+            }
+
+
+class AdmissionController:
+    def __init__(self, scheduler=None, rate=CLIENT_RATE, burst=CLIENT_BURST,
+                 detail_rate=DETAIL_CLIENT_RATE, detail_burst=DETAIL_CLIENT_BURST):
+        self.scheduler = scheduler or FairScheduler()
+        self.clients = HostRateLimiter(rate, burst)
+        self.detail_clients = HostRateLimiter(detail_rate, detail_burst)
+        self.rate_limited = 0
+        self.details_rate_limited = 0
+
+    @staticmethod
+    def _spend(limiter, client):
+        if len(limiter.buckets) >= CLIENT_BUCKETS_PRUNE_AT:
+            limiter.prune()
+        return limiter.try_acquire(client)
+
+    def check_rate(self, client):
+        """Spend one of the client's search tokens; raises Rejected when it has none"""
+        if not self._spend(self.clients, client):
+            self.rate_limited += 1
+            raise Rejected('Too many searches from this client, please slow down',
+                           self.clients.seconds_until(client))
+
+    def check_detail_rate(self, client):
+        """Spend one of the client's detail-fetch tokens; raises Rejected when it has none"""
+        if not self._spend(self.detail_clients, client):
+            self.details_rate_limited += 1
+            raise Rejected('Too many product details requested from this client, please slow down',
+                           self.detail_clients.seconds_until(client))
+
+    def enter(self, client):
+        """Admit one search for client; returns the release callback. Raises Rejected"""
+        self.check_rate(client)
+        self.scheduler.acquire(client)
+        start = time.perf_counter()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.scheduler.release(time.perf_counter() - start)
+        return release
+
+    @contextmanager
+    def admit(self, client):
+        release = self.enter(client)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self):
+        return dict(self.scheduler.snapshot(), rate_limited=self.rate_limited,
+                    details_rate_limited=self.details_rate_limited)
+
+
+controller = AdmissionController()
@@ -1,1136 +1,275 @@
-from flask import Flask, render_template, request, flash
+# Installed before the other imports so their cost shows up in /api/startup-stats
+import startup
+startup.install()
+
+from flask import Flask, render_template, request, flash, jsonify, Response, stream_with_context, make_response
+from markupsafe import Markup
 import os
+import json
 import urllib.parse
-import random
-import requests
-from bs4 import BeautifulSoup
 import re
 import time
+import threading
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import structured_log
+import profiling
+import fetch_backends
+import block_pages
+import selector_stats
+import matching
+import ranking
+import cache
+import http_cache
+import prewarm
+import enrichment
+import admission
+import autocomplete
+import warmup
+import export
+import rate_limit
+import request_profiles
+import platforms
+from platforms import AVAILABLE_PLATFORMS, generate_search_url, platform_for_url, route_to_stub
+from query_log import query_log
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-# Available platforms for price comparison (Indian e-commerce platforms)
-AVAILABLE_PLATFORMS = [
-    'Amazon',
-    'Flipkart',
-    'Myntra',
-    'Meesho',
-    'Snapdeal',
-    'Ajio',
-    'Nykaa',
-    'FirstCry',
-    'ShopClues',
-    'Paytm Mall'
-]
-
-def generate_search_url(platform, query):
-    """Generate actual search URLs for different Indian e-commerce platforms"""
-    encoded_query = urllib.parse.quote_plus(query)
-    
-    urls = {
-        'Amazon': f'https://www.amazon.in/s?k={encoded_query}',
-        'Flipkart': f'https://www.flipkart.com/search?q={encoded_query}',
-        'Myntra': f'https://www.myntra.com/{encoded_query.replace("+", "-")}',
-        'Meesho': f'https://www.meesho.com/search?q={encoded_query}',
-        'Snapdeal': f'https://www.snapdeal.com/search?keyword={encoded_query}',
-        'Ajio': f'https://www.ajio.com/search/?text={encoded_query}',
-        'Nykaa': f'https://www.nykaa.com/search/result/?q={encoded_query}',
-        'FirstCry': f'https://www.firstcry.com/search?q={encoded_query}',
-        'ShopClues': f'https://www.shopclues.com/search?q={encoded_query}',
-        'Paytm Mall': f'https://paytmmall.com/shop/search?q={encoded_query}'
-    }
-    return urls.get(platform, f'https://www.google.com/search?q={encoded_query}')
-
-def get_headers():
-    """Return headers to mimic a real browser request"""
-    return {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-IN,en-US;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Cache-Control': 'max-age=0',
-    }
+structured_log.configure()
+log = logging.getLogger(__name__)
 
-def scrape_amazon(query):
-    """Scrape Amazon.in for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Amazon', query)
-        session = requests.Session()
-        
-        # Enhanced headers for Amazon
-        amazon_headers = get_headers().copy()
-        amazon_headers.update({
-            'Referer': 'https://www.amazon.in/',
-            'Origin': 'https://www.amazon.in',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-        })
-        
-        # Add cookies to appear more like a real browser
-        session.cookies.set('session-id', '261-1234567-1234567', domain='.amazon.in')
-        session.cookies.set('session-id-time', '2082787201l', domain='.amazon.in')
-        
-        # Try with delay to avoid rate limiting
-        time.sleep(2)
-        
-        # Try multiple attempts with different approaches
-        response = None
-        for attempt in range(2):
-            try:
-                response = session.get(url, headers=amazon_headers, timeout=25, allow_redirects=True)
-                # If we get 200, break
-                if response.status_code == 200:
-                    break
-                # If 503, wait longer and try again
-                if response.status_code == 503 and attempt < 1:
-                    time.sleep(3)
-                    continue
-            except:
-                if attempt < 1:
-                    time.sleep(2)
-                    continue
-                return None
-        
-        if not response:
-            return None
-        
-        # Even if status code is not 200, try to parse the content
-        # Sometimes Amazon returns content even with 503
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        # Check if we got blocked (CAPTCHA or error page)
-        page_text = response.text.lower()
-        if 'captcha' in page_text or 'robot' in page_text or 'access denied' in page_text:
-            print("Amazon CAPTCHA or access denied detected")
-            # Still try to parse - sometimes there's data
-            if len(response.text) < 5000:  # Very short response likely means blocked
-                return None
-        
-        # Try multiple selectors for Amazon products
-        products = soup.find_all('div', {'data-component-type': 's-search-result'})
-        if not products:
-            products = soup.find_all('div', class_='s-result-item')
-        if not products:
-            products = soup.find_all('div', {'data-asin': True})
-        if not products:
-            # Try finding by data-index
-            products = soup.find_all('div', {'data-index': True})
-        
-        products = products[:5]  # Limit to 5 products
-        
-        for product in products:
-            try:
-                # Price extraction - try multiple methods
-                price = None
-                
-                # Method 1: a-price-whole (most common)
-                price_elem = product.find('span', class_='a-price-whole')
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace(',', ''))
-                    if price_match:
-                        try:
-                            price = int(price_match.group(1).replace(',', ''))
-                        except:
-                            pass
-                
-                # Method 2: a-offscreen (hidden price)
-                if not price:
-                    price_elem = product.find('span', class_='a-offscreen')
-                    if price_elem:
-                        price_text = price_elem.get_text(strip=True)
-                        price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                        if price_match:
-                            try:
-                                price = int(price_match.group(1).replace(',', ''))
-                            except:
-                                pass
-                
-                # Method 3: a-price (price container)
-                if not price:
-                    price_container = product.find('span', class_='a-price')
-                    if price_container:
-                        price_elem = price_container.find('span', class_='a-offscreen')
-                        if not price_elem:
-                            price_elem = price_container.find('span', class_='a-price-whole')
-                        if price_elem:
-                            price_text = price_elem.get_text(strip=True)
-                            price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                            if price_match:
-                                try:
-                                    price = int(price_match.group(1).replace(',', ''))
-                                except:
-                                    pass
-                
-                # Method 4: Search in all spans for ₹ symbol
-                if not price:
-                    for span in product.find_all('span'):
-                        text = span.get_text(strip=True)
-                        if '₹' in text:
-                            match = re.search(r'₹\s*(\d[\d,]*)', text)
-                            if match:
-                                try:
-                                    price = int(match.group(1).replace(',', ''))
-                                    if price > 100:  # Reasonable minimum
-                                        break
-                                except:
-                                    continue
-                
-                # Only add if we found a price
-                if price and price > 0:
-                    # Rating extraction
-                    rating = 'N/A'
-                    rating_elem = product.find('span', class_='a-icon-alt')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    # Try alternative rating selectors
-                    if rating == 'N/A':
-                        rating_elem = product.find('i', class_='a-icon-star')
-                        if rating_elem:
-                            rating_span = rating_elem.find_next('span', class_='a-icon-alt')
-                            if rating_span:
-                                rating_text = rating_span.get_text(strip=True)
-                                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                                if rating_match:
-                                    rating = rating_match.group(1)
-                    
-                    # Delivery information
-                    delivery = 'Free delivery on orders above ₹499'
-                    # Try multiple delivery selectors
-                    delivery_elems = product.find_all('span', string=re.compile('delivery|shipping|Get it|Prime', re.I))
-                    if delivery_elems:
-                        for elem in delivery_elems:
-                            delivery_text = elem.get_text(strip=True)
-                            if delivery_text and len(delivery_text) > 5:
-                                delivery = delivery_text[:50]
-                                break
-                    
-                    # Try to find delivery in aria-label
-                    if delivery == 'Free delivery on orders above ₹499':
-                        for elem in product.find_all(['span', 'div'], attrs={'aria-label': re.compile('delivery|shipping', re.I)}):
-                            delivery_text = elem.get('aria-label', '')
-                            if delivery_text and len(delivery_text) > 5:
-                                delivery = delivery_text[:50]
-                                break
-                    
-                    # Try finding in parent elements
-                    if delivery == 'Free delivery on orders above ₹499':
-                        parent = product.find_parent()
-                        if parent:
-                            delivery_span = parent.find('span', string=re.compile('delivery|shipping', re.I))
-                            if delivery_span:
-                                delivery = delivery_span.get_text(strip=True)[:50]
-                    
-                    # Product link
-                    link_elem = product.find('a', href=re.compile('/dp/|/gp/product/'))
-                    if not link_elem:
-                        h2 = product.find('h2')
-                        if h2:
-                            link_elem = h2.find('a')
-                    if not link_elem:
-                        link_elem = product.find('a', class_='a-link-normal')
-                    
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.amazon.in' + href.split('?')[0]
-                        elif href.startswith('http'):
-                            product_url = href.split('?')[0]
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except Exception as e:
-                print(f"Error processing Amazon product: {e}")
-                continue
-                
-        return results if results else None
-    except Exception as e:
-        print(f"Amazon scraping error: {e}")
-        return None
+# Search result pages fetched per platform by default, and the most a caller may ask for
+RESULT_DEPTH = int(os.environ.get('RESULT_DEPTH', '1'))
+MAX_RESULT_DEPTH = int(os.environ.get('MAX_RESULT_DEPTH', '5'))
+# Threads shared by all searches for fetching result pages concurrently
+PAGE_FETCH_WORKERS = int(os.environ.get('PAGE_FETCH_WORKERS', '8'))
 
-def scrape_flipkart(query):
-    """Scrape Flipkart for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Flipkart', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            print(f"Flipkart returned status code: {response.status_code}")
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        # Try multiple selectors for Flipkart products
-        products = soup.find_all('div', class_='_1AtVbE')
-        if not products:
-            products = soup.find_all('div', {'data-id': True})
-        if not products:
-            products = soup.find_all('div', class_='_2kHMtA')
-        if not products:
-            products = soup.find_all('a', class_='_1fQZEK', href=re.compile('/p/'))
-            # Convert links to parent containers
-            products = [p.parent for p in products if p.parent]
-        
-        products = products[:5]  # Limit to 5 products
-        
-        for product in products:
-            try:
-                # Price extraction - try multiple methods
-                price = None
-                
-                # Method 1: _30jeq3 (current price)
-                price_elem = product.find('div', class_='_30jeq3')
-                if not price_elem:
-                    price_elem = product.find('div', class_='_1_WHN1')
-                if not price_elem:
-                    price_elem = product.find('div', class_='_25b18c')
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                # Method 2: Search in all divs
-                if not price:
-                    for div in product.find_all('div'):
-                        text = div.get_text(strip=True)
-                        if '₹' in text and re.search(r'₹\s*(\d[\d,]*)', text):
-                            match = re.search(r'₹\s*(\d[\d,]*)', text)
-                            if match:
-                                try:
-                                    price = int(match.group(1).replace(',', ''))
-                                    if price > 100:  # Reasonable minimum
-                                        break
-                                except:
-                                    continue
-                
-                # Only add if we found a price
-                if price and price > 0:
-                    # Rating extraction
-                    rating = 'N/A'
-                    rating_elem = product.find('div', class_='_3LWZlK')
-                    if not rating_elem:
-                        rating_elem = product.find('span', class_='_2_R_DZ')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    # Delivery information
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('div', class_='_2TpdnF')
-                    if not delivery_elem:
-                        delivery_elem = product.find('span', string=re.compile('delivery|free', re.I))
-                    if delivery_elem:
-                        delivery_text = delivery_elem.get_text(strip=True)
-                        delivery = delivery_text[:50]
-                    
-                    # Product link
-                    link_elem = product.find('a', class_='_1fQZEK')
-                    if not link_elem:
-                        link_elem = product.find('a', href=re.compile('/p/'))
-                    if not link_elem:
-                        link_elem = product.find('a')
-                    
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.flipkart.com' + href.split('?')[0]
-                        elif href.startswith('http'):
-                            product_url = href.split('?')[0]
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except Exception as e:
-                print(f"Error processing Flipkart product: {e}")
-                continue
-                
-        return results if results else None
-    except Exception as e:
-        print(f"Flipkart scraping error: {e}")
-        return None
+def search_link_result(platform, query, label='Click to view'):
+    """Placeholder row linking to the platform's search page"""
+    return [{
+        'price': label,
+        'rating': label if label == 'Click to view' else 'N/A',
+        'delivery': label,
+        'url': generate_search_url(platform, query)
+    }]
 
-def scrape_myntra(query):
-    """Scrape Myntra for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Myntra', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            print(f"Myntra returned status code: {response.status_code}")
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        # Myntra product containers
-        products = soup.find_all('li', class_='product-base')
-        if not products:
-            products = soup.find_all('div', class_='product-base')
-        
-        products = products[:5]  # Limit to 5 products
-        
-        for product in products:
-            try:
-                # Price extraction - try multiple methods
-                price = None
-                
-                price_elem = product.find('span', class_='product-discountedPrice')
-                if not price_elem:
-                    price_elem = product.find('span', class_='product-price')
-                if not price_elem:
-                    # Search in all spans
-                    for span in product.find_all('span'):
-                        text = span.get_text(strip=True)
-                        if '₹' in text and re.search(r'₹\s*(\d[\d,]*)', text):
-                            match = re.search(r'₹\s*(\d[\d,]*)', text)
-                            if match:
-                                try:
-                                    price = int(match.group(1).replace(',', ''))
-                                    if price > 100:
-                                        break
-                                except:
-                                    continue
-                
-                if price_elem and not price:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                # Only add if we found a price
-                if price and price > 0:
-                    # Rating extraction
-                    rating = 'N/A'
-                    rating_elem = product.find('div', class_='product-ratingsContainer')
-                    if rating_elem:
-                        rating_span = rating_elem.find('span')
-                        if rating_span:
-                            rating_text = rating_span.get_text(strip=True)
-                            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                            if rating_match:
-                                rating = rating_match.group(1)
-                    
-                    # Delivery information
-                    delivery = 'Free delivery above ₹799'
-                    delivery_elem = product.find('div', class_='product-deliveryInfo')
-                    if delivery_elem:
-                        delivery_text = delivery_elem.get_text(strip=True)
-                        delivery = delivery_text[:50]
-                    
-                    # Product link
-                    link_elem = product.find('a')
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.myntra.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except Exception as e:
-                print(f"Error processing Myntra product: {e}")
-                continue
-                
-        return results if results else None
-    except Exception as e:
-        print(f"Myntra scraping error: {e}")
-        return None
+page_pool = ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS, thread_name_prefix='page-fetch')
 
-def scrape_snapdeal(query):
-    """Scrape Snapdeal for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Snapdeal', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='product-tuple-listing')
-        if not products:
-            products = soup.find_all('div', {'data-dp-id': True})
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('span', class_='product-price')
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = 'N/A'
-                    rating_elem = product.find('div', class_='filled-stars')
-                    if rating_elem:
-                        rating_style = rating_elem.get('style', '')
-                        rating_match = re.search(r'width:\s*(\d+)%', rating_style)
-                        if rating_match:
-                            rating_val = int(rating_match.group(1)) / 20
-                            rating = f"{rating_val:.1f}"
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/product/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.snapdeal.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+def clamp_depth(depth):
+    """Requested result depth limited to 1..MAX_RESULT_DEPTH"""
+    return max(1, min(int(depth), MAX_RESULT_DEPTH))
 
-def scrape_meesho(query):
-    """Scrape Meesho for product prices, ratings, and delivery details"""
+def parse_depth(values):
+    """Result depth from request form/args; raises ValueError on bad input"""
+    raw = (values.get('depth') or '').strip()
+    if not raw:
+        return RESULT_DEPTH
     try:
-        url = generate_search_url('Meesho', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='ProductCard__BaseCard')
-        if not products:
-            products = soup.find_all('div', {'data-test-id': 'product-card'})
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('div', class_='ProductCard__Price')
-                if not price_elem:
-                    price_elem = product.find('span', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('div', class_='ProductCard__Rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/product/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.meesho.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+        return clamp_depth(raw)
+    except ValueError:
+        raise ValueError('Result depth must be a whole number of pages')
 
-def scrape_ajio(query):
-    """Scrape Ajio for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Ajio', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='item rilrtl-products-list__item')
-        if not products:
-            products = soup.find_all('div', class_='product-item')
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('span', class_='price')
-                if not price_elem:
-                    price_elem = product.find('div', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('span', class_='rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/p/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.ajio.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+def affordable_depth(platform, depth):
+    """Pages worth fetching now: page 1 always, more only while the host's rate budget has tokens"""
+    if depth <= 1:
+        return 1
+    tokens = rate_limit.limiter.available(platform_host(platform))
+    return max(1, min(depth, int(tokens)))
 
-def scrape_nykaa(query):
-    """Scrape Nykaa for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Nykaa', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='product-tag')
-        if not products:
-            products = soup.find_all('div', class_='product-item')
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('span', class_='price')
-                if not price_elem:
-                    price_elem = product.find('div', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('div', class_='rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/p/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.nykaa.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+def _scrape_page(platform, query, page, failures):
+    # Pool threads are invisible to the request's profiler, so each page is profiled on its own
+    with fetch_backends.track_failures(failures), profiling.profile_task():
+        return platforms.scrape(platform, query, page)
 
-def scrape_firstcry(query):
-    """Scrape FirstCry for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('FirstCry', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='list-prod')
-        if not products:
-            products = soup.find_all('div', class_='product-item')
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('span', class_='price')
-                if not price_elem:
-                    price_elem = product.find('div', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('div', class_='rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/product/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.firstcry.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+def iter_pages(platform, query, depth, failures):
+    """Fetch result pages 1..depth concurrently, yielding each page's new offers as it arrives
 
-def scrape_shopclues(query):
-    """Scrape ShopClues for product prices, ratings, and delivery details"""
+    Offers are deduplicated by product URL across pages; rows that only
+    link back to a search page cannot be told apart and are all kept.
+    """
+    pages = range(1, depth + 1)
+    search_urls = {generate_search_url(platform, query, page) for page in pages}
+    # Workers share the caller's failure tally and trace ID
+    futures = [
+        page_pool.submit(contextvars.copy_context().run, _scrape_page, platform, query, page, failures)
+        for page in pages
+    ]
+    seen = set()
     try:
-        url = generate_search_url('ShopClues', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='product')
-        if not products:
-            products = soup.find_all('div', class_='product-item')
-        
-        products = products[:5]
-        
-        for product in products:
+        for future in as_completed(futures):
             try:
-                price = None
-                price_elem = product.find('span', class_='p_price')
-                if not price_elem:
-                    price_elem = product.find('span', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('div', class_='rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/product/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://www.shopclues.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
+                results = future.result() or []
+            except Exception as e:
+                log.warning("%s page scrape failed: %s", platform, e, extra={'platform': platform})
                 continue
-                
-        return results if results else None
-    except:
-        return None
+            fresh = []
+            for result in results:
+                if result['url'] not in search_urls:
+                    if result['url'] in seen:
+                        continue
+                    seen.add(result['url'])
+                fresh.append(result)
+            if fresh:
+                yield fresh
+    finally:
+        for future in futures:
+            future.cancel()
 
-def scrape_paytmmall(query):
-    """Scrape Paytm Mall for product prices, ratings, and delivery details"""
-    try:
-        url = generate_search_url('Paytm Mall', query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=15, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        products = soup.find_all('div', class_='_3Wh')
-        if not products:
-            products = soup.find_all('div', class_='product-item')
-        
-        products = products[:5]
-        
-        for product in products:
-            try:
-                price = None
-                price_elem = product.find('span', class_='_1kMS')
-                if not price_elem:
-                    price_elem = product.find('div', class_=re.compile('price', re.I))
-                
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price_match = re.search(r'(\d[\d,]*)', price_text.replace('₹', '').replace(',', ''))
-                    if price_match:
-                        price = int(price_match.group(1).replace(',', ''))
-                
-                if price and price > 0:
-                    rating = '4.0'
-                    rating_elem = product.find('div', class_='rating')
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-                    
-                    delivery = 'Free delivery'
-                    delivery_elem = product.find('span', string=re.compile('delivery|shipping', re.I))
-                    if delivery_elem:
-                        delivery = delivery_elem.get_text(strip=True)[:50]
-                    
-                    link_elem = product.find('a', href=re.compile('/product/'))
-                    product_url = url
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem['href']
-                        if href.startswith('/'):
-                            product_url = 'https://paytmmall.com' + href
-                        elif href.startswith('http'):
-                            product_url = href
-                    
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': f"{rating} ⭐" if rating != 'N/A' else '4.0 ⭐',
-                        'delivery': delivery,
-                        'url': product_url
-                    })
-            except:
-                continue
-                
-        return results if results else None
-    except:
-        return None
+def iter_results(platform, query, depth=1, refresh=False):
+    """Yield a platform's results in batches as they become available
 
-def scrape_platform(platform, query):
-    """Scrape products from a specific platform"""
-    if platform == 'Amazon':
-        return scrape_amazon(query)
-    elif platform == 'Flipkart':
-        return scrape_flipkart(query)
-    elif platform == 'Myntra':
-        return scrape_myntra(query)
-    elif platform == 'Snapdeal':
-        return scrape_snapdeal(query)
-    elif platform == 'Meesho':
-        return scrape_meesho(query)
-    elif platform == 'Ajio':
-        return scrape_ajio(query)
-    elif platform == 'Nykaa':
-        return scrape_nykaa(query)
-    elif platform == 'FirstCry':
-        return scrape_firstcry(query)
-    elif platform == 'ShopClues':
-        return scrape_shopclues(query)
-    elif platform == 'Paytm Mall':
-        return scrape_paytmmall(query)
-    else:
-        return None
+    Recent results are served from the result cache. Platforms that
+    recently failed for this query are answered from the negative cache
+    with the placeholder row instead of re-running the whole failing
+    scrape cascade. refresh=True skips both caches (used by the prewarmer).
+    """
+    if not refresh:
+        cached = cache.result_cache.get(platform, query, depth)
+        if cached is not None:
+            yield cached
+            return
+        if cache.negative_cache.get(platform, query):
+            yield search_link_result(platform, query)
+            return
 
-def generate_results(platform, query):
+    # Fewer pages when the host's rate budget is low; cached under what was actually fetched,
+    # so a later full-depth search does not get the shortened list
+    fetched_depth = affordable_depth(platform, depth)
+    results = []
+    with fetch_backends.track_failures() as failures:
+        for batch in iter_pages(platform, query, fetched_depth, failures):
+            results.extend(batch)
+            yield batch
+        if not results:
+            results = platforms.fallback(platform, query) or []
+            if results:
+                yield results
+    if results:
+        cache.result_cache.put(platform, query, results, fetched_depth)
+        return
+
+    cache.negative_cache.put(platform, query, failures.kind())
+    yield search_link_result(platform, query)
+
+def generate_results(platform, query, refresh=False, depth=1):
     """Generate product results by scraping or fallback to search link"""
-    # Try to scrape real prices
-    scraped_results = scrape_platform(platform, query)
-    
-    if scraped_results and len(scraped_results) > 0:
-        return scraped_results
-    
-    # For Amazon specifically, try alternative method
-    if platform == 'Amazon':
-        # Try mobile version or alternative URL
-        try:
-            mobile_url = f'https://www.amazon.in/s?k={urllib.parse.quote_plus(query)}&ref=sr_pg_1'
-            session = requests.Session()
-            mobile_headers = get_headers().copy()
-            mobile_headers['User-Agent'] = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'
-            response = session.get(mobile_url, headers=mobile_headers, timeout=20)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                products = soup.find_all('div', {'data-asin': True})[:3]
-                results = []
-                for product in products:
-                    try:
-                        price = None
-                        # Try to find price
-                        for span in product.find_all('span'):
-                            text = span.get_text(strip=True)
-                            if '₹' in text:
-                                match = re.search(r'₹\s*(\d[\d,]*)', text)
-                                if match:
-                                    try:
-                                        price = int(match.group(1).replace(',', ''))
-                                        if price > 100:
-                                            break
-                                    except:
-                                        continue
-                        if price:
-                            rating = '4.0'
-                            rating_elem = product.find('span', class_='a-icon-alt')
-                            if rating_elem:
-                                rating_text = rating_elem.get_text(strip=True)
-                                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                                if rating_match:
-                                    rating = rating_match.group(1)
-                            
-                            link_elem = product.find('a', href=re.compile('/dp/|/gp/product/'))
-                            product_url = mobile_url
-                            if link_elem and link_elem.get('href'):
-                                href = link_elem['href']
-                                if href.startswith('/'):
-                                    product_url = 'https://www.amazon.in' + href.split('?')[0]
-                            
-                            results.append({
-                                'price': f'₹{price:,}',
-                                'rating': f"{rating} ⭐",
-                                'delivery': 'Free delivery on orders above ₹499',
-                                'url': product_url
-                            })
-                    except:
-                        continue
-                if results:
-                    return results
-        except:
-            pass
-    
-    # Last resort: Try a simplified scraping approach for the platform
-    # This is a fallback that tries to extract any available data
-    try:
-        url = generate_search_url(platform, query)
-        session = requests.Session()
-        response = session.get(url, headers=get_headers(), timeout=20, allow_redirects=True)
-        
-        if response and response.status_code in [200, 301, 302]:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            results = []
-            
-            # Try to find any price information in the page
-            price_patterns = [
-                r'₹\s*(\d[\d,]*)',
-                r'Rs\.?\s*(\d[\d,]*)',
-                r'INR\s*(\d[\d,]*)',
-            ]
-            
-            # Search for prices in the entire page
-            page_text = soup.get_text()
-            prices_found = []
-            for pattern in price_patterns:
-                matches = re.findall(pattern, page_text)
-                for match in matches:
-                    try:
-                        price = int(match.replace(',', ''))
-                        if 100 <= price <= 10000000:  # Reasonable price range
-                            prices_found.append(price)
-                    except:
-                        continue
-            
-            # If we found prices, create results
-            if prices_found:
-                unique_prices = sorted(list(set(prices_found)))[:3]
-                for price in unique_prices:
-                    results.append({
-                        'price': f'₹{price:,}',
-                        'rating': '4.0 ⭐',
-                        'delivery': 'Free delivery',
-                        'url': url
-                    })
-                if results:
-                    return results
-    except:
-        pass
-    
-    # Final fallback: Provide search link
-    url = generate_search_url(platform, query)
-    return [{
-        'price': 'Click to view',
-        'rating': 'Click to view',
-        'delivery': 'Click to view',
-        'url': url
-    }]
+    return [result for batch in iter_results(platform, query, depth, refresh) for result in batch]
 
-def search_products(query, platforms):
-    """Search for products across selected platforms with real price scraping"""
+def search_products(query, platforms, filters=None, depth=1):
+    """Search for products across selected platforms with real price scraping
+
+    When filters (from ranking.parse_filters) are given, the response also
+    carries 'offers': the best matching offers merged across platforms.
+    depth is the number of search result pages fetched per platform.
+    """
     platforms_data = []
-    
+    breakdown = {}
+    search_start = time.perf_counter()
+
     for platform in platforms:
+        platform_start = time.perf_counter()
         try:
-            results = generate_results(platform, query)
+            results = generate_results(platform, query, depth=depth)
             platforms_data.append({
                 'platform': platform,
                 'results': results
             })
+            breakdown[platform] = {
+                'seconds': round(time.perf_counter() - platform_start, 3),
+                'results': len(results),
+                'fallback': results[0]['price'] == 'Click to view',
+            }
             # Small delay to avoid rate limiting
             time.sleep(0.5)
         except Exception as e:
-            print(f"Error searching {platform}: {e}")
+            log.error("Error searching %s: %s", platform, e, extra={'platform': platform})
+            breakdown[platform] = {
+                'seconds': round(time.perf_counter() - platform_start, 3),
+                'error': str(e),
+            }
+            cache.negative_cache.put(platform, query, 'error')
             # Fallback to search link
             platforms_data.append({
                 'platform': platform,
-                'results': [{
-                    'price': 'Check website',
-                    'rating': 'N/A',
-                    'delivery': 'Check website',
-                    'url': generate_search_url(platform, query)
-                }]
+                'results': search_link_result(platform, query, 'Check website')
             })
     
     # Generate summary
+    elapsed = time.perf_counter() - search_start
+    log.info("Search finished", extra={'query': query, 'seconds': round(elapsed, 3), 'platforms': breakdown})
+    profiling.record_search(query, breakdown, elapsed)
+
     total_results = sum(len(p['results']) for p in platforms_data)
     summary = f'Found {total_results} product options for "{query}" across {len(platforms)} platform(s). Click the links to view products and compare prices.'
-    
-    return {
+
+    response = {
         'platforms': platforms_data,
+        'products': matching.group_products(platforms_data),
         'summary': summary
     }
+    if filters:
+        response['offers'] = ranking.rank_offers(platforms_data, filters)
+        response['filters'] = filters
+        response['summary'] = (
+            f'Showing the top {len(response["offers"])} of {total_results} product options for "{query}" '
+            f'across {len(platforms)} platform(s), {ranking.SORT_LABELS[filters["sort"]].lower()}.'
+        )
+    return response
+
+@app.before_request
+def start_trace():
+    """Give every request a trace ID, reusing the caller's X-Request-ID if sent"""
+    incoming = request.headers.get('X-Request-ID', '')[:64]
+    structured_log.trace_id_var.set(incoming or structured_log.new_trace_id())
+
+@app.after_request
+def add_trace_header(response):
+    response.headers['X-Trace-Id'] = structured_log.trace_id_var.get()
+    return response
+
+@app.after_request
+def compress_response(response):
+    return http_cache.compress(response, request.accept_encodings)
+
+def search_tag(args, query, platforms, depth):
+    """ETag of a search's response, or None while any platform still needs scraping
+
+    Covers every request parameter, so it doubles as the key of the
+    rendered page and serialized API response in cache.fragment_cache.
+    """
+    version = cache.search_version(platforms, query, depth)
+    if version is None:
+        return None
+    return http_cache.etag(sorted(args.items(multi=True)), version)
+
+def render_results(response_json):
+    return Markup(render_template('_results.html', response_json=response_json))
+
+def current_client():
+    return admission.client_id(request.remote_addr, request.headers)
+
+@app.errorhandler(admission.Rejected)
+def search_rejected(e):
+    """Overloaded or over-eager client: fast 429 instead of queueing indefinitely"""
+    response = jsonify({'error': e.reason, 'retry_after': e.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     query = ''
     selected_platforms = []
-    response_json = None
+    results_html = None
+    filter_values = {}
+    rejected = None
     
     if request.method == 'POST':
         query = request.form.get('query', '').strip()
         selected_platforms = request.form.getlist('platforms')
+        filter_values = request.form
         
         if not query:
             flash('Please enter a product name', 'error')
@@ -1138,20 +277,323 @@ def index():
             flash('Please select at least one platform', 'error')
         else:
             try:
-                response_json = search_products(query, selected_platforms)
+                filters = ranking.parse_filters(request.form)
+                depth = parse_depth(request.form)
+                tag = search_tag(request.form, query, selected_platforms, depth)
+                results_html = cache.fragment_cache.get(('html', tag)) if tag else None
+                if results_html is not None:
+                    # Same results as last time: no scraping, matching or rendering
+                    query_log.record(query)
+                else:
+                    with admission.controller.admit(current_client()):
+                        query_log.record(query)
+                        with profiling.capture(query, selected_platforms, enabled=profiling.should_profile(request.headers)):
+                            response_json = search_products(query, selected_platforms, filters, depth)
+                    results_html = render_results(response_json)
+                    tag = search_tag(request.form, query, selected_platforms, depth)
+                    if tag:
+                        cache.fragment_cache.put(('html', tag), results_html, cache.RESULT_CACHE_TTL)
                 flash(f'Search completed! Found results on {len(selected_platforms)} platform(s).', 'success')
+            except admission.Rejected as e:
+                rejected = e
+                flash(f'{e.reason} (try again in {e.retry_after}s).', 'error')
+            except ValueError as e:
+                # Invalid filter values
+                flash(str(e), 'error')
             except Exception as e:
                 flash(f'Error searching products: {str(e)}', 'error')
-                response_json = None
+                results_html = None
     
-    return render_template(
+    response = make_response(render_template(
         'index.html',
         query=query,
         available_platforms=AVAILABLE_PLATFORMS,
         selected_platforms=selected_platforms,
-        response_json=response_json
-    )
+        results_html=results_html,
+        filter_values=filter_values,
+        sort_labels=ranking.SORT_LABELS,
+        default_depth=RESULT_DEPTH,
+        max_depth=MAX_RESULT_DEPTH
+    ))
+    if rejected is not None:
+        response.status_code = 429
+        response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+def parse_search_args(args):
+    """Query, platforms, filters and depth of an API search; raises ValueError on bad input"""
+    query = args.get('q', '').strip()
+    platforms = [p.strip() for p in args.get('platforms', '').split(',') if p.strip()]
+    if not query:
+        raise ValueError('Missing query parameter q')
+    unknown = [p for p in platforms if p not in AVAILABLE_PLATFORMS]
+    if unknown:
+        raise ValueError(f'Unknown platform(s): {", ".join(unknown)}')
+    return query, platforms or AVAILABLE_PLATFORMS, ranking.parse_filters(args), parse_depth(args)
+
+@app.route('/api/search')
+def api_search():
+    """JSON search: ?q=...&platforms=Amazon,Flipkart[&depth&min_price&max_price&min_rating&sort&top_k]"""
+    try:
+        query, platforms, filters, depth = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    tag = search_tag(request.args, query, platforms, depth)
+    if tag:
+        if request.if_none_match.contains_weak(tag):
+            query_log.record(query)
+            return http_cache.not_modified(tag)
+        body = cache.fragment_cache.get(('json', tag))
+        if body is not None:
+            query_log.record(query)
+            return search_response(body, tag)
+    with admission.controller.admit(current_client()):
+        query_log.record(query)
+        with profiling.capture(query, platforms, enabled=profiling.should_profile(request.headers)):
+            response = search_products(query, platforms, filters, depth)
+    if filters or request.args.get('group', '1') != '0':
+        # Ranked offers or per-product comparisons replace the per-platform
+        # dump; group=0 keeps it
+        del response['platforms']
+    body = jsonify(response).get_data()
+    tag = search_tag(request.args, query, platforms, depth)
+    if tag:
+        cache.fragment_cache.put(('json', tag), body, cache.RESULT_CACHE_TTL)
+    return search_response(body, tag)
+
+def search_response(body, tag):
+    """Serialized search JSON, revalidated by ETag when its results are cached"""
+    response = Response(body, mimetype='application/json')
+    if tag:
+        response.set_etag(tag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/search/stream')
+def api_search_stream():
+    """Newline-delimited JSON search: one line per batch of offers as result pages arrive
+
+    Takes the same parameters as /api/search; price filters are applied to
+    each batch, while sorting and top_k need the full result set and are
+    only available there.
+    """
+    try:
+        query, platforms, filters, depth = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Held until the response is closed, not just until the first batch
+    release = admission.controller.enter(current_client())
+    query_log.record(query)
+
+    def generate():
+        total = 0
+        for platform in platforms:
+            try:
+                for batch in iter_results(platform, query, depth):
+                    if filters:
+                        batch = [r for r in batch if ranking.matches(r, filters)]
+                    total += len(batch)
+                    yield json.dumps({'platform': platform, 'results': batch}, ensure_ascii=False) + '\n'
+            except Exception as e:
+                log.error("Error searching %s: %s", platform, e, extra={'platform': platform})
+                yield json.dumps({'platform': platform, 'results': search_link_result(platform, query, 'Check website')}) + '\n'
+        yield json.dumps({'summary': f'Found {total} product options for "{query}" across {len(platforms)} platform(s).'}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/export')
+def api_export():
+    """Search results as a columnar file: ?q=...&platforms=...&format=csv|parquet|arrow
+
+    Takes the same filters and depth as /api/search. CSV and Arrow are
+    streamed platform by platform, Parquet row group by row group.
+    """
+    try:
+        query, platforms, filters, depth = parse_search_args(request.args)
+        fmt = request.args.get('format', 'csv')
+        sink = export.ChunkSink()
+        writer = export.open_writer(fmt, sink)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    release = admission.controller.enter(current_client())
+    query_log.record(query)
+
+    def generate():
+        for platform in platforms:
+            try:
+                for batch in iter_results(platform, query, depth):
+                    if filters:
+                        batch = [r for r in batch if ranking.matches(r, filters)]
+                    writer.write_rows(export.offer_rows(query, platform, batch))
+            except Exception as e:
+                log.error("Error exporting %s: %s", platform, e, extra={'platform': platform})
+            if fmt != 'parquet':
+                # One Parquet row group per platform would be needlessly small;
+                # its writer fills a group every EXPORT_BATCH_ROWS rows instead
+                writer.flush()
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.close()
+        yield sink.drain()
+
+    mimetype, extension = export.FORMATS[fmt]
+    slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-')[:40] or 'search'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{slug}.{extension}"'
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/details')
+def api_details():
+    """Detail-page fields for one result: ?url=<product link>[&wait=seconds]
+
+    Answers 202 with Retry-After while the page is still being fetched,
+    429 when the client is fetching too many pages, and 503 when the
+    detail fetch queue is full.
+    """
+    url = request.args.get('url', '').strip()
+    platform = platform_for_url(url)
+    if platform is None:
+        return jsonify({'error': 'url must be a product link on a supported platform'}), 400
+    try:
+        wait = min(float(request.args.get('wait', enrichment.DETAIL_WAIT)), enrichment.DETAIL_WAIT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    client = current_client()
+    try:
+        # Each new product page is an outbound fetch, so it is rate limited per client like a search
+        details = enricher.get(platform, url, wait, admit=lambda: admission.controller.check_detail_rate(client))
+    except enrichment.Busy as e:
+        response = jsonify({'url': url, 'platform': platform, 'status': 'busy', 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    if details is None:
+        response = jsonify({'url': url, 'platform': platform, 'status': 'pending'})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if 'error' in details:
+        return jsonify({'url': url, 'platform': platform, 'status': 'failed', 'error': details['error']}), 502
+    return jsonify({'url': url, 'platform': platform, 'status': 'ready', 'details': details})
+
+@app.route('/api/selector-stats')
+def selector_hit_rates():
+    """Recent hit rate of each selector variant per platform and stage"""
+    return jsonify(selector_stats.stats.snapshot())
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Popular searches starting with ?q=, most searched first"""
+    prefix = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', autocomplete.AUTOCOMPLETE_LIMIT)), 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be a whole number'}), 400
+    response = jsonify({'suggestions': suggestions.suggest(prefix, limit)})
+    # Suggestions only change when the index is rebuilt
+    response.headers['Cache-Control'] = f'public, max-age={int(autocomplete.AUTOCOMPLETE_REFRESH)}'
+    return response
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Entry and hit counters for the search caches"""
+    return jsonify({
+        'results': cache.result_cache.stats(),
+        'fragments': cache.fragment_cache.stats(),
+        'compression': http_cache.stats.snapshot(),
+        'negative': cache.negative_cache.stats(),
+        'details': enricher.stats(),
+        'dns': warmup.dns_cache.stats(),
+        'prewarm': prewarmer.last_run,
+        'top_queries': query_log.top(10),
+        'autocomplete': suggestions.stats(),
+    })
+
+@app.route('/api/admission-stats')
+def admission_stats():
+    """Search slots, queue depth and rejection counters"""
+    return jsonify(admission.controller.stats())
+
+@app.route('/api/fetch-stats')
+def fetch_stats():
+    """Per-backend request, block, latency and cost counters"""
+    return jsonify(fetch_backends.stats())
+
+@app.route('/api/profile-stats')
+def profile_stats():
+    """Per-platform request-profile success rates, block counts and latency"""
+    return jsonify(request_profiles.pool.snapshot())
+
+@app.route('/api/block-stats')
+def block_stats():
+    """Per-platform counts of ok, captcha, denied, empty and error pages with block rates"""
+    return jsonify(block_pages.stats.snapshot())
+
+def platform_host(platform):
+    return urllib.parse.urlsplit(generate_search_url(platform, 'x')).hostname
+
+def fetch_detail_page(platform, url):
+    response = fetch_backends.fetch(platform, route_to_stub(platform, url), timeout=15)
+    return response.text if block_pages.usable(platform, response) else None
+
+enricher = enrichment.DetailEnricher(fetch_detail_page)
+
+suggestions = autocomplete.Autocomplete(query_log)
+
+prewarmer = prewarm.Prewarmer(
+    refresh=lambda platform, query: generate_results(platform, query, refresh=True),
+    platforms=AVAILABLE_PLATFORMS,
+    host_for=platform_host,
+)
+
+def platform_origins():
+    """scheme://host of every platform's search URL (the stub server's when in use)"""
+    return [
+        '{0.scheme}://{0.netloc}'.format(urllib.parse.urlsplit(generate_search_url(platform, 'x')))
+        for platform in AVAILABLE_PLATFORMS
+    ]
+
+warmer = warmup.Warmer(origins=platform_origins, headers=request_profiles.default_headers)
+
+_background_lock = threading.Lock()
+_background_started = False
+
+def start_background(wait=False):
+    """Start the warm-up and prewarm threads; once per process
+
+    Runs on the first request, so every WSGI server gets it, without
+    blocking that request. A worker startup hook can call it with
+    wait=True to have connections open before traffic arrives.
+    """
+    global _background_started
+    if _background_started:
+        return
+    with _background_lock:
+        if _background_started:
+            return
+        warmer.start(wait)
+        prewarmer.start()
+        _background_started = True
+
+@app.before_request
+def start_background_on_first_request():
+    start_background()
+
+@app.route('/api/startup-stats')
+def startup_stats():
+    """Startup time, import cost per component, and which platform scrapers are loaded"""
+    return jsonify(dict(startup.report(), enabled_platforms=AVAILABLE_PLATFORMS, loaded_platforms=platforms.loaded()))
+
+startup.mark_ready()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
+    # The debug reloader's parent process only watches files; warm up in the serving child
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background(wait=True)
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,104 @@
+"""Search-box suggestions from the most popular logged queries
+
+Queries are keyed by their letters and digits only, so "iPhone15 Pro",
+"iphone 15 pro" and "iphone 15-pro" all land on one entry, shown as its
+most searched spelling. Keys are held in a sorted array: a prefix is
+two bisections, and the matching slice is ranked by search count.
+Steering people to the popular spelling makes them hit the result cache.
+"""
+import bisect
+import heapq
+import os
+import re
+import threading
+import time
+
+from query_log import MAX_QUERY_LENGTH
+
+# Popular queries indexed, and how many searches a query needs before it is suggested
+AUTOCOMPLETE_INDEX_SIZE = int(os.environ.get('AUTOCOMPLETE_INDEX_SIZE', '2000'))
+AUTOCOMPLETE_MIN_COUNT = float(os.environ.get('AUTOCOMPLETE_MIN_COUNT', '2'))
+# The index is rebuilt from the query log when older than this many seconds
+AUTOCOMPLETE_REFRESH = float(os.environ.get('AUTOCOMPLETE_REFRESH', '60'))
+AUTOCOMPLETE_LIMIT = 8
+
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+
+def squash(query):
+    """Index key of a query: lowercase letters and digits only"""
+    return NON_ALNUM_RE.sub('', query.lower())
+
+
+class PrefixIndex:
+    """Immutable sorted-array index of (key, query, count)"""
+
+    def __init__(self, counted_queries, min_count=AUTOCOMPLETE_MIN_COUNT):
+        merged = {}
+        for query, count in counted_queries:
+            key = squash(query)
+            if not key:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [query, count, count]
+            else:
+                entry[2] += count
+                # Show the most searched spelling
+                if count > entry[1]:
+                    entry[0], entry[1] = query, count
+        entries = sorted((key, query, total) for key, (query, _, total) in merged.items() if total >= min_count)
+        self.keys = [key for key, _, _ in entries]
+        self.queries = [query for _, query, _ in entries]
+        self.counts = [count for _, _, count in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def suggest(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Up to limit (query, count) pairs whose key starts with prefix's key, most searched first"""
+        key = squash(prefix)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self.keys, key)
+        # Every key with this prefix sorts below prefix + the highest code point
+        hi = bisect.bisect_left(self.keys, key + '\U0010ffff', lo)
+        best = heapq.nlargest(limit, range(lo, hi), key=self.counts.__getitem__)
+        return [(self.queries[i], self.counts[i]) for i in best]
+
+
+class Autocomplete:
+    """PrefixIndex over query_log, rebuilt when stale"""
+
+    def __init__(self, query_log, size=AUTOCOMPLETE_INDEX_SIZE, refresh=AUTOCOMPLETE_REFRESH):
+        self.query_log = query_log
+        self.size = size
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        self.index = None
+        self.built_at = 0.0
+
+    def _current(self):
+        index = self.index
+        if index is not None and time.monotonic() - self.built_at < self.refresh:
+            return index
+        with self.lock:
+            # Another request may have rebuilt it while this one waited
+            if self.index is None or time.monotonic() - self.built_at >= self.refresh:
+                self.index = PrefixIndex(self.query_log.top(self.size))
+                self.built_at = time.monotonic()
+            return self.index
+
+    def suggest(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Most searched queries starting with prefix, ignoring case, spaces and punctuation"""
+        # Longer queries are never logged, so a longer prefix cannot match
+        if len(prefix) > MAX_QUERY_LENGTH:
+            return []
+        return [query for query, _ in self._current().suggest(prefix, limit)]
+
+    def stats(self):
+        index = self.index
+        return {
+            'entries': len(index) if index is not None else 0,
+            'age_seconds': round(time.monotonic() - self.built_at, 1) if index is not None else None,
+        }
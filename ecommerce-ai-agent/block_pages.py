@@ -0,0 +1,127 @@
+"""Cheap block-page classification before any parsing
+
+CAPTCHA walls, WAF denials and empty bodies are recognised from the status
+code, a couple of headers, the body size and the first BLOCK_SCAN_BYTES of
+the raw body. Nothing is decoded and no DOM is built, so scrapers can drop
+block pages before BeautifulSoup ever sees them. Labels are counted per
+platform so block rates show up at /api/block-stats.
+"""
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+# Only this much of the raw body is scanned for block markers
+BLOCK_SCAN_BYTES = int(os.environ.get('BLOCK_SCAN_BYTES', '8192'))
+# Real search and product pages are bigger than this, block pages are not;
+# above it only the <title> is checked, since scripts mention "captcha" freely
+BLOCK_PAGE_MAX_BYTES = int(os.environ.get('BLOCK_PAGE_MAX_BYTES', '20000'))
+# Bodies shorter than this carry nothing worth parsing
+EMPTY_PAGE_BYTES = int(os.environ.get('EMPTY_PAGE_BYTES', '512'))
+
+OK = 'ok'
+CAPTCHA = 'captcha'
+DENIED = 'denied'
+EMPTY = 'empty'
+# Any other non-200 status (404, 500, ...); not a block
+ERROR = 'error'
+LABELS = (OK, CAPTCHA, DENIED, EMPTY, ERROR)
+BLOCKED_LABELS = {CAPTCHA, DENIED}
+
+BLOCK_STATUS_CODES = {403, 429, 503}
+# Retailers also serve real result pages with these under load, so they
+# only count as blocked when the body carries a block marker
+MARKER_ONLY_STATUS_CODES = {503}
+# Matched against the lowercased raw bytes
+CAPTCHA_MARKERS = (b'captcha', b'robot check', b'not a robot', b'are you a human', b'verify you are human',
+                   b'unusual traffic', b'cf-chl-')
+DENIED_MARKERS = (b'access denied', b'request blocked', b'403 forbidden', b"don't have permission")
+
+
+def _title(head):
+    start = head.find(b'<title')
+    if start == -1:
+        return b''
+    end = head.find(b'</title', start)
+    return head[start:end if end != -1 else start + 200]
+
+
+def _marker_label(text):
+    if any(marker in text for marker in CAPTCHA_MARKERS):
+        return CAPTCHA
+    if any(marker in text for marker in DENIED_MARKERS):
+        return DENIED
+    return None
+
+
+def classify(response):
+    """Label a response 'ok', 'captcha', 'denied', 'empty' or 'error' from its raw bytes"""
+    headers = response.headers
+    # Cloudflare and AWS WAF announce challenges in headers
+    if headers.get('cf-mitigated', '').lower() == 'challenge' \
+            or headers.get('x-amzn-waf-action', '').lower() == 'captcha':
+        return CAPTCHA
+    body = response.content or b''
+    head = body[:BLOCK_SCAN_BYTES].lower()
+    if response.status_code in BLOCK_STATUS_CODES:
+        marker = _marker_label(head)
+        if marker or response.status_code not in MARKER_ONLY_STATUS_CODES:
+            return marker or DENIED
+    elif response.status_code != 200:
+        return ERROR
+    if len(body) > BLOCK_PAGE_MAX_BYTES:
+        return _marker_label(_title(head)) or OK
+    label = _marker_label(head)
+    if label:
+        return label
+    return EMPTY if len(body.strip()) < EMPTY_PAGE_BYTES else OK
+
+
+def label(response):
+    """classify(response), computed once per response and kept on it"""
+    cached = getattr(response, 'block_label', None)
+    if cached is None:
+        cached = response.block_label = classify(response)
+    return cached
+
+
+def is_blocked(response):
+    return label(response) in BLOCKED_LABELS
+
+
+def usable(platform, response):
+    """Whether a fetched page is worth parsing; block and empty pages short-circuit here"""
+    if response is None:
+        return False
+    page_label = label(response)
+    if page_label != OK:
+        log.info("%s page skipped: %s (status %s)", platform, page_label, response.status_code,
+                 extra={'platform': platform})
+        return False
+    return True
+
+
+class BlockStats:
+    """Per-platform counts of each label and the resulting block rate"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, platform, page_label):
+        with self.lock:
+            counts = self.counts.setdefault(platform, dict.fromkeys(LABELS, 0))
+            counts[page_label] += 1
+
+    def snapshot(self):
+        with self.lock:
+            report = {}
+            for platform, counts in self.counts.items():
+                total = sum(counts.values())
+                blocked = sum(counts[name] for name in BLOCKED_LABELS)
+                report[platform] = dict(counts, total=total, block_rate=round(blocked / total, 3) if total else 0.0)
+            return report
+
+
+stats = BlockStats()
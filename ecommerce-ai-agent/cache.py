@@ -0,0 +1,152 @@
+"""In-process TTL caches for search results"""
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# How long each kind of platform failure is remembered, in seconds
+NEGATIVE_TTLS = {
+    'timeout': float(os.environ.get('NEG_CACHE_TTL_TIMEOUT', '60')),
+    'blocked': float(os.environ.get('NEG_CACHE_TTL_BLOCKED', '300')),
+    'empty': float(os.environ.get('NEG_CACHE_TTL_EMPTY', '900')),
+    'error': float(os.environ.get('NEG_CACHE_TTL_ERROR', '60')),
+}
+NEGATIVE_CACHE_SIZE = int(os.environ.get('NEG_CACHE_SIZE', '5000'))
+
+# Successful per-platform scrape results
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '900'))
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', '5000'))
+
+# Rendered result pages and serialized API responses, keyed by the cache state they were built from
+FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', '500'))
+
+
+def normalize_query(query):
+    """Canonical cache key form of a search query"""
+    return re.sub(r'\s+', ' ', query.strip().lower())
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries each carry their own expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key):
+        """Live value for key, or None; does not count as a hit or refresh recency"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[1] if entry is not None and entry[0] > time.monotonic() else None
+
+    def ttl_remaining(self, key):
+        """Seconds until key expires (0 if absent); does not count as a hit"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return max(0.0, entry[0] - time.monotonic()) if entry else 0.0
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class NegativeCache:
+    """Remembers (platform, query) pairs that recently produced only a placeholder"""
+
+    def __init__(self, ttls=None, max_entries=NEGATIVE_CACHE_SIZE):
+        self.ttls = dict(NEGATIVE_TTLS if ttls is None else ttls)
+        self.cache = TTLCache(max_entries)
+
+    def get(self, platform, query):
+        """Failure kind if this pair failed recently, else None"""
+        return self.cache.get((platform, normalize_query(query)))
+
+    def put(self, platform, query, kind):
+        self.cache.put((platform, normalize_query(query)), kind, self.ttls.get(kind, 0))
+
+    def peek(self, platform, query):
+        return self.cache.peek((platform, normalize_query(query)))
+
+    def stats(self):
+        return self.cache.stats()
+
+
+class ResultCache:
+    """Recent successful results per (platform, normalized query, result depth)
+
+    Every put is stamped with a new version number, so a version identifies
+    one particular set of results for as long as the process lives.
+    """
+
+    def __init__(self, ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.cache = TTLCache(max_entries)
+        self.versions = itertools.count(1)
+
+    def get(self, platform, query, depth=1):
+        entry = self.cache.get((platform, normalize_query(query), depth))
+        return entry[1] if entry is not None else None
+
+    def put(self, platform, query, results, depth=1):
+        self.cache.put((platform, normalize_query(query), depth), (next(self.versions), results), self.ttl)
+
+    def version(self, platform, query, depth=1):
+        """Version of the cached results, or None if there are none"""
+        entry = self.cache.peek((platform, normalize_query(query), depth))
+        return entry[0] if entry is not None else None
+
+    def ttl_remaining(self, platform, query, depth=1):
+        return self.cache.ttl_remaining((platform, normalize_query(query), depth))
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def search_version(platforms, query, depth=1):
+    """Cache state a search would be answered from, or None if any platform would be scraped
+
+    Per platform this is the result-cache version, or the failure kind when
+    the negative cache would answer instead, mirroring iter_results. Equal
+    states mean equal search responses.
+    """
+    state = []
+    for platform in platforms:
+        version = result_cache.version(platform, query, depth)
+        if version is None:
+            version = negative_cache.peek(platform, query)
+            if version is None:
+                return None
+        state.append((platform, version))
+    return tuple(state)
+
+
+negative_cache = NegativeCache()
+result_cache = ResultCache()
+fragment_cache = TTLCache(FRAGMENT_CACHE_SIZE)
@@ -0,0 +1,216 @@
+"""Lazy product-detail enrichment
+
+Search pages only carry snippets, so delivery and rating are often guesses.
+Detail pages are fetched on demand (when a result row is expanded) on a
+small background pool and the parsed fields are cached per product URL, so
+the search path itself never waits on them.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import cache
+import page_state
+
+log = logging.getLogger(__name__)
+
+DETAIL_CACHE_TTL = float(os.environ.get('DETAIL_CACHE_TTL', '21600'))
+DETAIL_CACHE_SIZE = int(os.environ.get('DETAIL_CACHE_SIZE', '5000'))
+DETAIL_WORKERS = int(os.environ.get('DETAIL_WORKERS', '4'))
+# Longest a details request waits on a fetch before answering "pending"
+DETAIL_WAIT = float(os.environ.get('DETAIL_WAIT', '8'))
+# Pages that could not be fetched or parsed are retried after this many seconds
+DETAIL_FAILURE_TTL = float(os.environ.get('DETAIL_FAILURE_TTL', '60'))
+# Detail fetches queued or running at once; further new URLs are turned away
+DETAIL_MAX_PENDING = int(os.environ.get('DETAIL_MAX_PENDING', '64'))
+# Retry-After hint when the fetch queue is full
+DETAIL_BUSY_RETRY = 5
+
+FIELDS = ('delivery', 'rating', 'rating_count', 'availability', 'seller')
+
+# CSS selectors per platform and field, in preference order
+DETAIL_SELECTORS = {
+    'Amazon': {
+        'delivery': ['#mir-layer-delivery-message', '#deliveryBlockMessage', '[data-csa-c-delivery-time]'],
+        'rating': ['#acrPopover'],
+        'rating_count': ['#acrCustomerReviewText'],
+        'availability': ['#availability'],
+        'seller': ['#merchant-info', '#sellerProfileTriggerId'],
+    },
+}
+
+DELIVERY_TEXT_RE = re.compile(r'(?:free\s+)?delivery\s+(?:by|on)\b[^.|\n]{0,40}|get it by[^.|\n]{0,40}', re.I)
+COUNT_RE = re.compile(r'(\d[\d,]*)')
+SCHEMA_AVAILABILITY = {
+    'InStock': 'In stock',
+    'OutOfStock': 'Out of stock',
+    'PreOrder': 'Pre-order',
+    'LimitedAvailability': 'Limited stock',
+}
+
+
+def _schema_product(platform, html):
+    """First schema.org Product object in the page's JSON-LD"""
+    for source, blob in page_state.state_blobs(platform, html):
+        if source != 'json-ld':
+            continue
+        queue = deque([blob])
+        while queue:
+            node = queue.popleft()
+            if isinstance(node, dict):
+                if node.get('@type') == 'Product':
+                    return node
+                queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+            elif isinstance(node, list):
+                queue.extend(node)
+    return None
+
+
+def _from_schema(product):
+    details = {}
+    rating = product.get('aggregateRating') or {}
+    if isinstance(rating, dict):
+        # Normalised with the other sources in parse_details
+        details['rating'] = str(rating.get('ratingValue', '')) or None
+        count = rating.get('ratingCount') or rating.get('reviewCount')
+        details['rating_count'] = int(count) if str(count).isdigit() else None
+    offers = product.get('offers') or {}
+    if isinstance(offers, list):
+        offers = offers[0] if offers and isinstance(offers[0], dict) else {}
+    availability = str(offers.get('availability', '')).rsplit('/', 1)[-1]
+    details['availability'] = SCHEMA_AVAILABILITY.get(availability)
+    seller = offers.get('seller')
+    details['seller'] = seller.get('name') if isinstance(seller, dict) else None
+    return details
+
+
+def _select_text(soup, selectors):
+    for selector in selectors:
+        elem = soup.select_one(selector)
+        if elem is None:
+            continue
+        # Amazon keeps "4.3 out of 5 stars" in the title attribute
+        text = elem.get('title') or elem.get_text(' ', strip=True)
+        if text:
+            return ' '.join(text.split())
+    return None
+
+
+def parse_details(platform, html):
+    """Delivery, rating, rating count, availability and seller from a detail page
+
+    Missing fields are None. Returns None when nothing at all was found,
+    which usually means a block page.
+    """
+    # The parsing stack loads with the first detail page, not at startup
+    from bs4 import BeautifulSoup
+    from extractor import parse_rating
+
+    details = dict.fromkeys(FIELDS)
+    product = _schema_product(platform, html)
+    if product is not None:
+        details.update({k: v for k, v in _from_schema(product).items() if v is not None})
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for field, selectors in DETAIL_SELECTORS.get(platform, {}).items():
+        if details[field] is None:
+            details[field] = _select_text(soup, selectors)
+    details['rating'] = parse_rating(details['rating'])
+    if isinstance(details['rating_count'], str):
+        match = COUNT_RE.search(details['rating_count'])
+        details['rating_count'] = int(match.group(1).replace(',', '')) if match else None
+    if details['seller']:
+        details['seller'] = re.sub(r'^(Ships from and )?sold by\s+', '', details['seller'], flags=re.I).rstrip('.')
+    if details['delivery'] is None:
+        # One line per element, so the match cannot run into neighbouring text
+        match = DELIVERY_TEXT_RE.search(soup.get_text('\n'))
+        if match:
+            details['delivery'] = ' '.join(match.group(0).split())
+
+    if all(value is None for value in details.values()):
+        return None
+    if details['delivery']:
+        # "FREE delivery <b>Tuesday</b>. Details" -> "FREE delivery Tuesday"
+        delivery = re.sub(r'\s+([.,])', r'\1', details['delivery'])
+        details['delivery'] = delivery.split('. ')[0].rstrip('.')[:80]
+    return details
+
+
+class Busy(Exception):
+    """The detail fetch queue is full; retry_after is a whole number of seconds"""
+
+    def __init__(self, retry_after=DETAIL_BUSY_RETRY):
+        super().__init__('Too many product pages are being fetched, try again shortly')
+        self.retry_after = retry_after
+
+
+class DetailEnricher:
+    """Per-URL detail cache filled by a background fetch pool
+
+    fetch(platform, url) returns the page HTML, or None on failure.
+    Concurrent requests for the same URL share one fetch. At most
+    max_pending fetches are queued or running, which also bounds the
+    executor's queue.
+    """
+
+    def __init__(self, fetch, ttl=DETAIL_CACHE_TTL, workers=DETAIL_WORKERS, max_pending=DETAIL_MAX_PENDING):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.cache = cache.TTLCache(DETAIL_CACHE_SIZE)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='detail-fetch')
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.rejected = 0
+
+    def get(self, platform, url, wait=DETAIL_WAIT, admit=None):
+        """Details for url, fetching them in the background on a miss
+
+        Returns None if they are not ready within wait seconds; a later
+        call picks up the result of the same fetch. admit() is called
+        before a new fetch is started and may raise to refuse it (cache
+        hits and polls of a running fetch are never charged). Raises Busy
+        when max_pending fetches are already outstanding.
+        """
+        details = self.cache.get(url)
+        if details is not None:
+            return details
+        with self.lock:
+            future = self.pending.get(url)
+            if future is None:
+                if len(self.pending) >= self.max_pending:
+                    self.rejected += 1
+                    raise Busy()
+                if admit is not None:
+                    admit()
+                future = self.pool.submit(contextvars.copy_context().run, self._load, platform, url)
+                self.pending[url] = future
+        try:
+            return future.result(timeout=max(wait, 0))
+        except FutureTimeout:
+            return None
+
+    def _load(self, platform, url):
+        try:
+            html = self.fetch(platform, url)
+            details = parse_details(platform, html) if html else None
+        except Exception as e:
+            log.warning("Detail fetch failed for %s: %s", url, e, extra={'platform': platform})
+            details = None
+        if details is None:
+            details = {'error': 'Product page could not be fetched or parsed'}
+            self.cache.put(url, details, DETAIL_FAILURE_TTL)
+        else:
+            self.cache.put(url, details, self.ttl)
+        with self.lock:
+            self.pending.pop(url, None)
+        return details
+
+    def stats(self):
+        with self.lock:
+            in_flight = len(self.pending)
+        return dict(self.cache.stats(), in_flight=in_flight, rejected=self.rejected)
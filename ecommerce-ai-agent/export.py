@@ -0,0 +1,282 @@
+"""Columnar export of search results as CSV, Parquet or Arrow
+
+Rows are typed (integer price, float rating, UTC timestamp) and written in
+batches of EXPORT_BATCH_ROWS, so memory stays bounded however many rows a
+run produces. Parquet and Arrow need the optional pyarrow package.
+
+Batch runs from the command line:
+    python export.py --queries-file queries.txt --platforms Amazon,Flipkart --format parquet --out run.parquet
+    python export.py --queries "iphone 15,lg oled tv" --format csv --out - --with-stub
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+# pyarrow is optional and slow to import, so it is loaded by the first
+# Parquet or Arrow export rather than at startup (see _load_pyarrow)
+pa = None
+
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', '10000'))
+
+COLUMNS = ('query', 'platform', 'title', 'price', 'rating', 'delivery', 'url', 'scraped_at')
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def _load_pyarrow():
+    """The pyarrow module, imported on first use; None when it is not installed"""
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            return None
+        pa = pyarrow
+    return pa
+
+
+def arrow_schema():
+    _load_pyarrow()
+    return pa.schema([
+        ('query', pa.string()),
+        ('platform', pa.string()),
+        ('title', pa.string()),
+        ('price', pa.int64()),
+        ('rating', pa.float64()),
+        ('delivery', pa.string()),
+        ('url', pa.string()),
+        ('scraped_at', pa.timestamp('ms', tz='UTC')),
+    ])
+
+
+def offer_rows(query, platform, results, scraped_at=None):
+    """Typed export rows for one platform's results; placeholder rows are skipped"""
+    scraped_at = scraped_at or datetime.now(timezone.utc)
+    for result in results:
+        if result.get('price_value') is None:
+            continue
+        yield {
+            'query': query,
+            'platform': platform,
+            'title': result.get('title'),
+            'price': result['price_value'],
+            'rating': result.get('rating_value'),
+            'delivery': result.get('delivery'),
+            'url': result.get('url'),
+            'scraped_at': scraped_at,
+        }
+
+
+class ExportWriter:
+    """Buffers rows and hands them to _write_batch EXPORT_BATCH_ROWS at a time"""
+
+    def __init__(self, sink, batch_rows=EXPORT_BATCH_ROWS):
+        self.sink = sink
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self.rows = 0
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if self.buffer:
+            self._write_batch(self.buffer)
+            self.rows += len(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+
+class CsvExportWriter(ExportWriter):
+    """UTF-8 CSV with a header row; empty cells for missing values"""
+
+    def __init__(self, sink, batch_rows=EXPORT_BATCH_ROWS):
+        super().__init__(sink, batch_rows)
+        self.text = io.StringIO()
+        self.csv = csv.writer(self.text)
+        self._emit([COLUMNS])
+
+    def _emit(self, records):
+        self.csv.writerows(records)
+        self.sink.write(self.text.getvalue().encode('utf-8'))
+        self.text.seek(0)
+        self.text.truncate()
+
+    def _write_batch(self, rows):
+        self._emit(
+            [row[c].isoformat(timespec='milliseconds') if c == 'scraped_at' else row[c] for c in COLUMNS]
+            for row in rows
+        )
+
+
+class _ArrowExportWriter(ExportWriter):
+    def __init__(self, sink, batch_rows=EXPORT_BATCH_ROWS):
+        if _load_pyarrow() is None:
+            raise ValueError('Parquet and Arrow export need pyarrow (pip install pyarrow)')
+        super().__init__(sink, batch_rows)
+        self.schema = arrow_schema()
+        self.writer = self._open(pa.PythonFile(sink, mode='w'))
+
+    def _write_batch(self, rows):
+        self.writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+
+class ParquetExportWriter(_ArrowExportWriter):
+    """Parquet file; each batch becomes one row group"""
+
+    def _open(self, sink):
+        return pa.parquet.ParquetWriter(sink, self.schema, compression='zstd')
+
+
+class ArrowExportWriter(_ArrowExportWriter):
+    """Arrow IPC stream, readable batch by batch with pyarrow.ipc.open_stream"""
+
+    def _open(self, sink):
+        return pa.ipc.new_stream(sink, self.schema)
+
+
+WRITERS = {
+    'csv': CsvExportWriter,
+    'parquet': ParquetExportWriter,
+    'arrow': ArrowExportWriter,
+}
+
+
+def open_writer(fmt, sink, batch_rows=EXPORT_BATCH_ROWS):
+    """Export writer for fmt over a binary sink; raises ValueError for unknown or unavailable formats"""
+    if fmt not in WRITERS:
+        raise ValueError(f'Unknown export format: {fmt} (choose from {", ".join(WRITERS)})')
+    return WRITERS[fmt](sink, batch_rows)
+
+
+class ChunkSink:
+    """Binary file-like object that collects writes so they can be streamed out"""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_search_rows(search, queries, platforms, concurrency=4):
+    """Export rows for every (query, platform) pair, at most 2 x concurrency searches in flight
+
+    search(platform, query) returns that platform's result rows.
+    """
+    pairs = ((query, platform) for query in queries for platform in platforms)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+        while True:
+            while len(in_flight) < concurrency * 2:
+                pair = next(pairs, None)
+                if pair is None:
+                    break
+                in_flight[pool.submit(search, pair[1], pair[0])] = pair
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                query, platform = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f'{platform} {query!r} failed: {e}', file=sys.stderr)
+                    continue
+                yield from offer_rows(query, platform, results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export search results as CSV, Parquet or Arrow')
+    parser.add_argument('--queries', help='comma-separated queries')
+    parser.add_argument('--queries-file', help='file with one query per line')
+    parser.add_argument('--platforms', default=None, help='comma-separated platforms (default: all)')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv')
+    parser.add_argument('--out', required=True, help="output file, or '-' for stdout")
+    parser.add_argument('--depth', type=int, default=1, help='result pages per platform')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--batch-rows', type=int, default=EXPORT_BATCH_ROWS)
+    parser.add_argument('--with-stub', action='store_true',
+                        help='start a local stub server and point the app at it')
+    args = parser.parse_args()
+
+    if args.queries_file:
+        with open(args.queries_file, encoding='utf-8') as fh:
+            queries = [line.strip() for line in fh if line.strip()]
+    elif args.queries:
+        queries = [q.strip() for q in args.queries.split(',') if q.strip()]
+    else:
+        parser.error('give --queries or --queries-file')
+
+    if args.with_stub:
+        import stub_server
+        _, base_url = stub_server.start_in_background()
+        # Must be set before app is imported, which reads it at module load
+        os.environ['STUB_BASE_URL'] = base_url
+    import app as app_module
+
+    platforms = [p.strip() for p in args.platforms.split(',')] if args.platforms else app_module.AVAILABLE_PLATFORMS
+    depth = app_module.clamp_depth(args.depth)
+
+    def search(platform, query):
+        return app_module.generate_results(platform, query, depth=depth)
+
+    sink = sys.stdout.buffer if args.out == '-' else open(args.out, 'wb')
+    start = time.perf_counter()
+    try:
+        with open_writer(args.format, sink, args.batch_rows) as writer:
+            writer.write_rows(iter_search_rows(search, queries, platforms, args.concurrency))
+    finally:
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    print(f'Wrote {writer.rows} rows for {len(queries)} queries in {time.perf_counter() - start:.1f}s',
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
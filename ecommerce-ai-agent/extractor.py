@@ -0,0 +1,134 @@
+"""Single-pass field extraction for product subtrees
+
+The scrapers used to call find/find_all on each product many times (one per
+price method, again for delivery spans, aria-labels and links) and ran
+get_text() on every span, which re-reads nested text once per ancestor.
+ProductFields walks the subtree exactly once, indexing what the scrapers
+look up, so per-product cost is linear in subtree size.
+"""
+import re
+
+from bs4 import Comment, NavigableString, Tag
+
+RUPEE_PRICE_RE = re.compile(r'₹\s*(\d[\d,]*)')
+NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+
+# Text inside these tags is never user-visible
+SKIP_TEXT_PARENTS = {'script', 'style', 'noscript'}
+
+
+class ProductFields:
+    """Index of one product subtree built in a single traversal"""
+
+    def __init__(self, product):
+        self.product = product
+        # (tag, class) -> first element, in document order
+        self.by_class = {}
+        # tag -> first element
+        self.by_tag = {}
+        # Visible text fragments in document order
+        self.texts = []
+        # (parent tag, text) for elements whose only child is a text node
+        self.own_texts = []
+        # (tag, aria-label) in document order
+        self.aria_labels = []
+        # (element, href) for every link with an href
+        self.links = []
+        self._walk(product)
+
+    def _walk(self, product):
+        for node in product.descendants:
+            if isinstance(node, Tag):
+                name = node.name
+                self.by_tag.setdefault(name, node)
+                for class_name in node.get('class') or ():
+                    self.by_class.setdefault((name, class_name), node)
+                aria_label = node.get('aria-label')
+                if aria_label:
+                    self.aria_labels.append((name, aria_label))
+                if name == 'a':
+                    href = node.get('href')
+                    if href:
+                        self.links.append((node, href))
+            elif isinstance(node, NavigableString) and not isinstance(node, Comment):
+                parent = node.parent
+                if parent is None or parent.name in SKIP_TEXT_PARENTS:
+                    continue
+                text = node.strip()
+                if not text:
+                    continue
+                self.texts.append(text)
+                if len(parent.contents) == 1:
+                    self.own_texts.append((parent.name, text))
+
+    def first(self, tag, class_name):
+        """First tag element carrying class_name, like product.find(tag, class_=class_name)"""
+        return self.by_class.get((tag, class_name))
+
+    def first_matching(self, tag, class_pattern):
+        """First tag element with any class matching the compiled class_pattern"""
+        for (name, class_name), elem in self.by_class.items():
+            if name == tag and class_pattern.search(class_name):
+                return elem
+        return None
+
+    def text(self, tag, class_name):
+        """Stripped text of the first tag.class_name, or None"""
+        elem = self.first(tag, class_name)
+        return elem.get_text(strip=True) if elem is not None else None
+
+    def rupee_price(self, minimum=100):
+        """First '₹ amount' in the product text above minimum (or the last one seen)"""
+        price = None
+        for match in RUPEE_PRICE_RE.finditer(' '.join(self.texts)):
+            try:
+                price = int(match.group(1).replace(',', ''))
+            except ValueError:
+                continue
+            if price > minimum:
+                break
+        return price
+
+    def own_text_matching(self, pattern, tags=('span',), min_length=0):
+        """First text that alone fills one of tags and matches pattern"""
+        for name, text in self.own_texts:
+            if name in tags and len(text) > min_length and pattern.search(text):
+                return text
+        return None
+
+    def aria_label_matching(self, pattern, tags=('span', 'div'), min_length=0):
+        for name, label in self.aria_labels:
+            if name in tags and len(label) > min_length and pattern.search(label):
+                return label
+        return None
+
+    def link(self, href_pattern=None, class_name=None):
+        """First link whose href matches href_pattern and/or which has class_name"""
+        for elem, href in self.links:
+            if href_pattern is not None and not href_pattern.search(href):
+                continue
+            if class_name is not None and class_name not in (elem.get('class') or ()):
+                continue
+            return elem
+        return None
+
+
+def parse_rating(text):
+    """First decimal number in a rating string like '4.3 out of 5 stars'"""
+    if not text:
+        return None
+    match = NUMBER_RE.search(text)
+    return match.group(1) if match else None
+
+
+def absolute_url(href, origin, fallback, strip_query=False):
+    """Resolve a scraped href against the platform origin"""
+    if not href:
+        return fallback
+    if strip_query:
+        href = href.split('?')[0]
+    if href.startswith('/'):
+        return origin + href
+    if href.startswith('http'):
+        return href
+    return fallback
@@ -0,0 +1,110 @@
+"""Response compression and validators
+
+Text responses are compressed with brotli when the client accepts it and
+the optional brotli package is installed, else gzip. Search responses get
+weak ETags built from the request and the result-cache versions behind
+them (cache.search_version), so a client revalidating an unchanged search
+gets a 304 without anything being scraped, ranked or rendered again.
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import Response
+
+# Bodies smaller than this are sent as-is; compressing them barely saves a packet
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+# Brotli quality 0-11; the top levels are meant for static assets, not per-request bodies
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_TYPES = {'text/html', 'text/plain', 'text/css', 'text/csv', 'application/json',
+                      'application/javascript', 'application/x-ndjson'}
+
+# Imported on first use (see _load_brotli); False once known to be missing
+brotli = None
+
+# Result-cache versions restart with the process, so ETags from an earlier run must not match
+_EPOCH = os.urandom(4).hex()
+
+
+def _load_brotli():
+    """The brotli module, or None when it is not installed"""
+    global brotli
+    if brotli is None:
+        try:
+            import brotli as module
+        except ImportError:
+            module = False
+        brotli = module
+    return brotli or None
+
+
+def negotiate(accept_encodings):
+    """'br', 'gzip' or None for a request's parsed Accept-Encoding header"""
+    offered = ['br', 'gzip'] if _load_brotli() else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+class CompressionStats:
+    """Responses compressed and bytes before/after, per encoding"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, encoding, size, compressed_size):
+        with self.lock:
+            counts = self.counts.setdefault(encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+            counts['responses'] += 1
+            counts['bytes_in'] += size
+            counts['bytes_out'] += compressed_size
+
+    def snapshot(self):
+        with self.lock:
+            return {encoding: dict(counts, ratio=round(counts['bytes_out'] / counts['bytes_in'], 3))
+                    for encoding, counts in self.counts.items()}
+
+
+stats = CompressionStats()
+
+
+def compress(response, accept_encodings):
+    """Compress a buffered text response in place if the client accepts it
+
+    Streamed responses (NDJSON search, exports) and file passthroughs are
+    left alone: they are sent chunk by chunk as they are produced.
+    """
+    if response.direct_passthrough or response.is_streamed \
+            or response.status_code != 200 or 'Content-Encoding' in response.headers \
+            or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate(accept_encodings)
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        # mtime=0 keeps identical bodies byte-identical
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    stats.record(encoding, len(body), len(compressed))
+    return response
+
+
+def etag(*parts):
+    """Weak-comparable ETag value for a response determined entirely by parts"""
+    return hashlib.blake2b(repr((_EPOCH,) + parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def not_modified(tag):
+    """Empty 304 answering a conditional request whose ETag still matches"""
+    response = Response(status=304)
+    response.set_etag(tag, weak=True)
+    return response
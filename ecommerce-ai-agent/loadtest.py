@@ -0,0 +1,221 @@
+"""Load generator for the search page
+
+Drives index() at a target concurrency, either in-process through the Flask
+test client or over HTTP against a running server, and reports throughput
+and latency percentiles of successful (200) searches; rejections and
+errors are counted separately. Each worker acts as its own client, so the
+per-client search limit applies per worker, as it would to real users.
+
+Examples:
+    python loadtest.py --with-stub --concurrency 8 --requests 200
+    python loadtest.py --url http://127.0.0.1:8000/ --concurrency 16 --duration 60
+"""
+import argparse
+import itertools
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_QUERIES = [
+    'iphone 15 pro',
+    'sony wh-1000xm5',
+    'lg oled tv',
+    'running shoes',
+    'face serum',
+    'baby stroller',
+    'wireless mouse',
+    'cotton kurta',
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadResult:
+    """Thread-safe collector of per-request latencies and outcomes
+
+    Only 200 responses count towards the latency percentiles: a fast 429
+    says nothing about how long a search takes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+
+    def add(self, latency, status):
+        with self.lock:
+            if status == 200:
+                self.latencies.append(latency)
+            self.statuses[status] += 1
+
+    def report(self, wall_time, concurrency):
+        latencies = sorted(self.latencies)
+        total = sum(self.statuses.values())
+        succeeded = len(latencies)
+        lines = [
+            f'Requests:     {total} at concurrency {concurrency} in {wall_time:.2f}s',
+            f'Succeeded:    {succeeded} (200), failed or rejected: {total - succeeded}',
+            f'Throughput:   {succeeded / wall_time if wall_time else 0:.2f} successful req/s',
+            f'Latency p50:  {percentile(latencies, 50) * 1000:.0f} ms',
+            f'Latency p95:  {percentile(latencies, 95) * 1000:.0f} ms',
+            f'Latency p99:  {percentile(latencies, 99) * 1000:.0f} ms',
+            f'Latency max:  {(latencies[-1] if latencies else 0) * 1000:.0f} ms',
+            'Statuses:     ' + ', '.join(f'{k}={v}' for k, v in sorted(self.statuses.items(), key=str)),
+        ]
+        return '\n'.join(lines)
+
+
+def client_addresses():
+    """Distinct fake client IPs, one per worker thread"""
+    for n in itertools.count(1):
+        yield f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}'
+
+
+def make_inprocess_sender():
+    """Return a send(form) callable that posts to index() via the Flask test client"""
+    import app as app_module
+
+    local = threading.local()
+    addresses = client_addresses()
+    addresses_lock = threading.Lock()
+
+    def send(form):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app_module.app.test_client()
+            # Otherwise every worker is 127.0.0.1 and shares one client's search budget
+            with addresses_lock:
+                client.environ_base['REMOTE_ADDR'] = next(addresses)
+        return client.post('/', data=form).status_code
+
+    return send
+
+
+def make_http_sender(url, timeout):
+    """Return a send(form) callable that posts to a running server
+
+    Each worker sends its own X-Forwarded-For address, which the server
+    treats as a separate client when run with TRUST_PROXY_HEADERS=1.
+    """
+    import requests
+
+    local = threading.local()
+    addresses = client_addresses()
+    addresses_lock = threading.Lock()
+
+    def send(form):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            with addresses_lock:
+                session.headers['X-Forwarded-For'] = next(addresses)
+        try:
+            return session.post(url, data=form, timeout=timeout).status_code
+        except requests.RequestException as e:
+            return type(e).__name__
+
+    return send
+
+
+def run(send, queries, platforms, concurrency, total_requests=None, duration=None, seed=None):
+    """Issue searches until total_requests are done or duration elapses"""
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    result = LoadResult()
+    issued = [0]
+    issued_lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+
+    def next_form():
+        with issued_lock:
+            if total_requests is not None and issued[0] >= total_requests:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            issued[0] += 1
+        with rng_lock:
+            return {'query': rng.choice(queries), 'platforms': list(platforms)}
+
+    def worker():
+        while True:
+            form = next_form()
+            if form is None:
+                return
+            start = time.perf_counter()
+            try:
+                status = send(form)
+            except Exception as e:
+                status = type(e).__name__
+            result.add(time.perf_counter() - start, status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the price comparison search')
+    parser.add_argument('--url', help='POST to a running server instead of calling index() in-process')
+    parser.add_argument('--with-stub', action='store_true',
+                        help='start a local stub server and point the in-process app at it')
+    parser.add_argument('--stub-latency', type=float, default=50.0, help='stub latency in ms')
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    parser.add_argument('--stub-captcha-rate', type=float, default=0.0)
+    parser.add_argument('--stub-truncate-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=None, help='total searches to issue')
+    parser.add_argument('--duration', type=float, default=None, help='seconds to run for')
+    parser.add_argument('--platforms', default='Flipkart,Myntra,Snapdeal',
+                        help='comma-separated platforms per search')
+    parser.add_argument('--queries', default=None, help='comma-separated query list')
+    parser.add_argument('--no-client-limit', action='store_true',
+                        help='in-process only: lift the per-client search rate limit (CLIENT_RATE/CLIENT_BURST)')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 50
+
+    queries = [q.strip() for q in args.queries.split(',')] if args.queries else DEFAULT_QUERIES
+    platforms = [p.strip() for p in args.platforms.split(',') if p.strip()]
+
+    if args.url:
+        send = make_http_sender(args.url, args.timeout)
+    else:
+        if args.with_stub:
+            import stub_server
+            config = stub_server.StubConfig(
+                latency_ms=args.stub_latency,
+                jitter_ms=args.stub_latency / 2,
+                error_rate=args.stub_error_rate,
+                captcha_rate=args.stub_captcha_rate,
+                truncate_rate=args.stub_truncate_rate,
+                seed=args.seed,
+            )
+            _, base_url = stub_server.start_in_background(config=config)
+            # Must be set before app is imported, which reads it at module load
+            os.environ['STUB_BASE_URL'] = base_url
+            print(f'Stub server running at {base_url}')
+        if args.no_client_limit:
+            os.environ['CLIENT_RATE'] = os.environ['CLIENT_BURST'] = '1e9'
+        send = make_inprocess_sender()
+
+    result, wall_time = run(send, queries, platforms, args.concurrency,
+                            total_requests=args.requests, duration=args.duration, seed=args.seed)
+    print(result.report(wall_time, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Group listings of the same product across platforms
+
+Titles are normalised into token sets ("128 GB" -> "128gb", stopwords
+dropped) and summarised as MinHash signatures. Locality-sensitive hashing
+over signature bands finds candidate pairs without comparing every offer
+with every other, so grouping stays near-linear in the number of offers.
+Candidates are confirmed with the exact Jaccard similarity of their token
+sets and a guard that model numbers, variant words (Pro, Max, ...) and
+sizes agree, then merged with union-find.
+"""
+import os
+import random
+import re
+import zlib
+from collections import defaultdict
+
+# Token-set Jaccard similarity two titles need to count as the same product
+MATCH_THRESHOLD = float(os.environ.get('MATCH_THRESHOLD', '0.6'))
+# Signature length and LSH bands; rows per band = permutations / bands
+MINHASH_PERMUTATIONS = int(os.environ.get('MINHASH_PERMUTATIONS', '64'))
+LSH_BANDS = int(os.environ.get('LSH_BANDS', '16'))
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = {'a', 'an', 'and', 'the', 'for', 'with', 'of', 'by', 'to', 'on', 'new', 'buy', 'online', 'latest'}
+# Units glued onto a preceding number so "128 GB" and "128GB" tokenise alike
+UNITS = {
+    'gb': 'gb', 'tb': 'tb', 'mb': 'mb', 'mah': 'mah', 'mp': 'mp', 'hz': 'hz', 'w': 'w',
+    'ml': 'ml', 'l': 'l', 'ltr': 'l', 'litre': 'l', 'g': 'g', 'gm': 'g', 'kg': 'kg',
+    'mm': 'mm', 'cm': 'cm', 'in': 'in', 'inch': 'in', 'inches': 'in',
+}
+MEASURE_RE = re.compile(r'^(\d+(?:\.\d+)?)([a-z]+)$')
+# Words that tell variants of one model apart
+VARIANT_WORDS = {'pro', 'max', 'plus', 'mini', 'ultra', 'lite', 'air', 'fe', 'neo', 'prime', 'slim'}
+
+# Mersenne prime modulus for the universal hash family
+_PRIME = (1 << 61) - 1
+
+
+def title_tokens(title):
+    """Normalised token set of a listing title"""
+    tokens = []
+    for word in TOKEN_RE.findall((title or '').lower()):
+        if word in UNITS and tokens and tokens[-1].replace('.', '').isdigit():
+            tokens[-1] += UNITS[word]
+        elif word not in STOPWORDS:
+            tokens.append(word)
+    return frozenset(tokens)
+
+
+def _key_tokens(tokens):
+    """(model tokens, {unit: size}) that must agree for two titles to match"""
+    model = set()
+    measures = {}
+    for token in tokens:
+        measure = MEASURE_RE.match(token)
+        if measure and measure.group(2) in UNITS.values():
+            measures[measure.group(2)] = measure.group(1)
+        elif token in VARIANT_WORDS or any(c.isdigit() for c in token):
+            model.add(token)
+    return model, measures
+
+
+def compatible(tokens_a, tokens_b):
+    """Whether model numbers and variant words match and shared size units agree
+
+    A size given by only one title ("iPhone 15" vs "iPhone 15 128GB") is
+    not a conflict, but 128GB vs 256GB is.
+    """
+    model_a, measures_a = _key_tokens(tokens_a)
+    model_b, measures_b = _key_tokens(tokens_b)
+    if model_a != model_b:
+        return False
+    return all(measures_b[unit] == size for unit, size in measures_a.items() if unit in measures_b)
+
+
+def jaccard(tokens_a, tokens_b):
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+class MatchIndex:
+    """MinHash/LSH index of offers, grouped into products on demand"""
+
+    def __init__(self, threshold=MATCH_THRESHOLD, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS):
+        self.threshold = threshold
+        self.rows = max(1, permutations // bands)
+        self.bands = bands
+        # Fixed seed: signatures are only compared within one index, but stable
+        # output makes grouping reproducible
+        rng = random.Random(0x5EED)
+        self.hashes = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                       for _ in range(self.rows * bands)]
+        # Titles share most of their words, so each token is hashed once
+        self.token_hashes = {}
+        self.offers = []
+        self.tokens = []
+        # (band, band values) -> offer indexes
+        self.buckets = defaultdict(list)
+
+    def _token_hashes(self, token):
+        hashes = self.token_hashes.get(token)
+        if hashes is None:
+            value = zlib.crc32(token.encode('utf-8'))
+            hashes = self.token_hashes[token] = [(a * value + b) % _PRIME for a, b in self.hashes]
+        return hashes
+
+    def signature(self, tokens):
+        """MinHash signature: per hash function, the minimum over the title's tokens"""
+        return [min(column) for column in zip(*(self._token_hashes(token) for token in tokens))]
+
+    def add(self, offer):
+        """Index one offer dict; placeholder rows without a price are left out
+
+        Offers without a usable title are kept but can only form a group of one.
+        """
+        if offer.get('price_value') is None:
+            return
+        tokens = title_tokens(offer.get('title'))
+        index = len(self.offers)
+        self.offers.append(offer)
+        self.tokens.append(tokens)
+        if not tokens:
+            return
+        signature = self.signature(tokens)
+        for band in range(self.bands):
+            start = band * self.rows
+            self.buckets[(band, tuple(signature[start:start + self.rows]))].append(index)
+
+    def _candidate_pairs(self):
+        pairs = set()
+        for members in self.buckets.values():
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+        return pairs
+
+    def groups(self):
+        """Lists of offer indexes that are the same product, singletons included"""
+        parent = list(range(len(self.offers)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for first, second in self._candidate_pairs():
+            a, b = self.tokens[first], self.tokens[second]
+            if jaccard(a, b) >= self.threshold and compatible(a, b):
+                parent[find(first)] = find(second)
+
+        grouped = defaultdict(list)
+        for i in range(len(self.offers)):
+            grouped[find(i)].append(i)
+        return list(grouped.values())
+
+
+def group_products(platforms_data, threshold=MATCH_THRESHOLD):
+    """Per-product price comparisons from per-platform search results
+
+    Each product lists its offers cheapest first with the platform added,
+    plus the best price and the spread to the dearest offer. Products sold
+    on the most platforms come first, then the cheapest.
+    """
+    index = MatchIndex(threshold)
+    for block in platforms_data:
+        for result in block['results']:
+            index.add(dict(result, platform=block['platform']))
+
+    products = []
+    for members in index.groups():
+        offers = sorted((index.offers[i] for i in members),
+                        key=lambda offer: (offer['price_value'], -(offer.get('rating_value') or 0)))
+        best = offers[0]
+        titles = [offer['title'] for offer in offers if offer.get('title')]
+        products.append({
+            # The shortest title is usually the least decorated one
+            'title': min(titles, key=len) if titles else None,
+            'offers': offers,
+            'platforms': sorted({offer['platform'] for offer in offers}),
+            'best_price': best['price'],
+            'best_price_value': best['price_value'],
+            'best_platform': best['platform'],
+            'price_spread': offers[-1]['price_value'] - best['price_value'],
+        })
+    products.sort(key=lambda product: (-len(product['platforms']), product['best_price_value']))
+    return products
@@ -0,0 +1,164 @@
+"""Fast path that reads search results from JSON embedded in the page
+
+Many retailers ship their search result set as page state for client-side
+hydration (``window.__INITIAL_STATE__ = {...}``, ``__NEXT_DATA__``, JSON-LD).
+That state is located with plain string searches and decoded with
+``json.JSONDecoder.raw_decode`` straight from the raw HTML, so no DOM is
+built, and it does not depend on obfuscated class names.
+"""
+import json
+import re
+from collections import deque
+
+# Script-variable assignments each platform is known to embed, checked first
+STATE_VARIABLES = {
+    'Flipkart': ('window.__INITIAL_STATE__',),
+    'Myntra': ('window.__myx',),
+    'Ajio': ('window.__PRELOADED_STATE__',),
+    'Nykaa': ('window.__PRELOADED_STATE__',),
+}
+
+NEXT_DATA_RE = re.compile(r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>')
+JSON_LD_RE = re.compile(r'<script[^>]*\btype=["\']application/ld\+json["\'][^>]*>', re.I)
+
+# Keys that hold a product's price, URL and rating across the known state shapes.
+# Earlier keys win, so the selling price is preferred over the MRP.
+PRICE_KEYS = ('finalPrice', 'offerPrice', 'sellingPrice', 'discountedPrice', 'price', 'pricing', 'offers', 'mrp')
+NESTED_PRICE_KEYS = PRICE_KEYS + ('value', 'amount')
+URL_KEYS = ('url', 'productURL', 'productUrl', 'landingPageUrl', 'baseUrl', 'link')
+RATING_KEYS = ('rating', 'averageRating', 'avgRating', 'aggregateRating')
+NESTED_RATING_KEYS = ('average', 'ratingValue', 'value')
+TITLE_KEYS = ('name', 'productName', 'title', 'titles')
+
+# Guards against pathological state blobs
+MAX_NODES = 50000
+
+_decoder = json.JSONDecoder()
+
+
+def _decode_at(html, start):
+    """Decode the JSON value that starts at or after start, or None"""
+    brace = min((i for i in (html.find('{', start), html.find('[', start)) if i != -1), default=-1)
+    if brace == -1:
+        return None
+    try:
+        value, _ = _decoder.raw_decode(html, brace)
+    except ValueError:
+        return None
+    return value
+
+
+def state_blobs(platform, html):
+    """Yield (source, decoded JSON) for every embedded state blob in the page"""
+    for variable in STATE_VARIABLES.get(platform, ()):
+        start = html.find(variable)
+        if start != -1:
+            equals = html.find('=', start + len(variable))
+            if equals != -1:
+                value = _decode_at(html, equals + 1)
+                if value is not None:
+                    yield variable.split('.')[-1], value
+    match = NEXT_DATA_RE.search(html)
+    if match:
+        value = _decode_at(html, match.end())
+        if value is not None:
+            yield '__NEXT_DATA__', value
+    for match in JSON_LD_RE.finditer(html):
+        value = _decode_at(html, match.end())
+        if value is not None:
+            yield 'json-ld', value
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        cleaned = value.replace('₹', '').replace(',', '').strip()
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+def _lookup_number(node, keys, nested_keys, depth=2):
+    """First numeric value under keys, following nested dicts/lists a couple of levels"""
+    for key in keys:
+        value = node.get(key)
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            value = value[0]
+        if isinstance(value, dict):
+            if depth > 0:
+                found = _lookup_number(value, nested_keys, nested_keys, depth - 1)
+                if found is not None:
+                    return found
+            continue
+        number = _number(value)
+        if number is not None:
+            return number
+    return None
+
+
+def _lookup_title(node):
+    """Product title under TITLE_KEYS, e.g. Flipkart's {'titles': {'title': ...}}"""
+    for key in TITLE_KEYS:
+        value = node.get(key)
+        if isinstance(value, dict):
+            value = value.get('title') or value.get('name')
+        if isinstance(value, str) and value.strip():
+            return ' '.join(value.split())[:200]
+    return None
+
+
+def _offer(node):
+    """Offer fields of a product-like dict, or None if it is not one"""
+    href = next((node[key] for key in URL_KEYS if isinstance(node.get(key), str) and node[key]), None)
+    if not href:
+        return None
+    price = _lookup_number(node, PRICE_KEYS, NESTED_PRICE_KEYS)
+    if not price or price <= 0:
+        return None
+    rating = _lookup_number(node, RATING_KEYS, NESTED_RATING_KEYS)
+    if not href.startswith(('/', 'http')):
+        # Relative paths such as Myntra's "tshirts/roadster/123/buy"
+        href = '/' + href
+    return {
+        'price': int(price),
+        'rating': f'{rating:.1f}' if rating and 0 < rating <= 5 else None,
+        'href': href,
+        'title': _lookup_title(node),
+    }
+
+
+def find_offers(state, limit):
+    """Walk decoded state breadth-first and collect up to limit product offers"""
+    offers = []
+    seen = set()
+    queue = deque([state])
+    visited = 0
+    while queue and len(offers) < limit and visited < MAX_NODES:
+        node = queue.popleft()
+        visited += 1
+        if isinstance(node, dict):
+            offer = _offer(node)
+            if offer is not None:
+                # Don't descend into a product: its variants would repeat it
+                if offer['href'] not in seen:
+                    seen.add(offer['href'])
+                    offers.append(offer)
+                continue
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            queue.extend(v for v in node if isinstance(v, (dict, list)))
+    return offers
+
+
+def extract_offers(platform, html, limit):
+    """(source, offers) from the first embedded state blob that lists products, else (None, [])"""
+    for source, state in state_blobs(platform, html):
+        offers = find_offers(state, limit)
+        if offers:
+            return source, offers
+    return None, []
@@ -0,0 +1,147 @@
+"""Platform plugin registry and search URLs
+
+Each retailer's scraper is a module in this package exposing
+scrape(query, page=1), and optionally fallback(query) for when that finds
+nothing. A module is imported the first time its platform is searched,
+together with the parsing stack it needs (bs4, extractor, selector
+tables), so a worker only pays for the platforms it actually serves.
+ENABLED_PLATFORMS picks which platforms a deployment offers.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+log = logging.getLogger(__name__)
+
+# Scraper module per supported platform (Indian e-commerce platforms)
+PLATFORM_MODULES = {
+    'Amazon': 'platforms.amazon',
+    'Flipkart': 'platforms.flipkart',
+    'Myntra': 'platforms.myntra',
+    'Meesho': 'platforms.meesho',
+    'Snapdeal': 'platforms.snapdeal',
+    'Ajio': 'platforms.ajio',
+    'Nykaa': 'platforms.nykaa',
+    'FirstCry': 'platforms.firstcry',
+    'ShopClues': 'platforms.shopclues',
+    'Paytm Mall': 'platforms.paytmmall',
+}
+GENERIC_MODULE = 'platforms.generic'
+
+# Comma-separated platforms to offer; all supported platforms when unset
+_enabled = [p.strip() for p in os.environ.get('ENABLED_PLATFORMS', '').split(',') if p.strip()]
+for _name in _enabled:
+    if _name not in PLATFORM_MODULES:
+        log.warning("Ignoring unknown platform %r in ENABLED_PLATFORMS", _name)
+AVAILABLE_PLATFORMS = [p for p in PLATFORM_MODULES if p in _enabled] if _enabled else list(PLATFORM_MODULES)
+
+# Base URL of a local stub server (see stub_server.py); when set, every
+# platform search is routed there instead of the real retailer
+STUB_BASE_URL = os.environ.get('STUB_BASE_URL', '').rstrip('/')
+
+# Query parameter each platform uses for the results page number
+PAGE_PARAMS = {
+    'Myntra': 'p',
+    'Nykaa': 'page_no',
+}
+
+# name -> imported scraper module
+_loaded = {}
+# Held while a scraper module is imported, so concurrent first searches import it once
+_load_lock = threading.Lock()
+
+
+def load(platform):
+    """Scraper module for an enabled platform, imported on first use; None otherwise"""
+    module = _loaded.get(platform)
+    if module is None:
+        if platform not in AVAILABLE_PLATFORMS:
+            return None
+        with _load_lock:
+            module = _loaded.get(platform)
+            if module is None:
+                start = time.perf_counter()
+                module = _loaded[platform] = importlib.import_module(PLATFORM_MODULES[platform])
+                log.info("Loaded %s scraper in %.1f ms", platform, (time.perf_counter() - start) * 1000,
+                         extra={'platform': platform})
+    return module
+
+
+def scrape(platform, query, page=1):
+    """Scrape one search results page of platform; None for unknown or disabled platforms"""
+    module = load(platform)
+    return module.scrape(query, page) if module is not None else None
+
+
+def fallback(platform, query):
+    """Platform-specific fallback, then the generic price scan, for when scrape() finds nothing"""
+    module = load(platform)
+    if module is None:
+        return None
+    if hasattr(module, 'fallback'):
+        results = module.fallback(query)
+        if results:
+            return results
+    return importlib.import_module(GENERIC_MODULE).scan_prices(platform, query)
+
+
+def loaded():
+    return sorted(_loaded)
+
+
+def retailer_search_url(platform, query, page=1):
+    """Search URL on the retailer's own site"""
+    encoded_query = urllib.parse.quote_plus(query)
+    
+    urls = {
+        'Amazon': f'https://www.amazon.in/s?k={encoded_query}',
+        'Flipkart': f'https://www.flipkart.com/search?q={encoded_query}',
+        'Myntra': f'https://www.myntra.com/{encoded_query.replace("+", "-")}',
+        'Meesho': f'https://www.meesho.com/search?q={encoded_query}',
+        'Snapdeal': f'https://www.snapdeal.com/search?keyword={encoded_query}',
+        'Ajio': f'https://www.ajio.com/search/?text={encoded_query}',
+        'Nykaa': f'https://www.nykaa.com/search/result/?q={encoded_query}',
+        'FirstCry': f'https://www.firstcry.com/search?q={encoded_query}',
+        'ShopClues': f'https://www.shopclues.com/search?q={encoded_query}',
+        'Paytm Mall': f'https://paytmmall.com/shop/search?q={encoded_query}'
+    }
+    url = urls.get(platform, f'https://www.google.com/search?q={encoded_query}')
+    if page > 1 and platform in urls:
+        url += ('&' if '?' in url else '?') + f'{PAGE_PARAMS.get(platform, "page")}={page}'
+    return url
+
+
+def route_to_stub(platform, url):
+    """Rewrite a retailer URL onto STUB_BASE_URL when the stub server is in use"""
+    if not STUB_BASE_URL or platform not in PLATFORM_MODULES:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    slug = platform.lower().replace(' ', '')
+    return f'{STUB_BASE_URL}/{slug}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+
+
+def generate_search_url(platform, query, page=1):
+    """Generate actual search URLs for different Indian e-commerce platforms"""
+    return route_to_stub(platform, retailer_search_url(platform, query, page))
+
+
+# Retailer hostname per platform, for recognising product links
+PLATFORM_HOSTS = {
+    platform: urllib.parse.urlsplit(retailer_search_url(platform, 'x')).hostname
+    for platform in PLATFORM_MODULES
+}
+
+
+def platform_for_url(url):
+    """Platform whose site a product URL points at, or None"""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        return None
+    for platform, host in PLATFORM_HOSTS.items():
+        if parts.hostname == host:
+            return platform
+    return None
+
@@ -0,0 +1,178 @@
+"""Amazon.in search results scraper"""
+import logging
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+import request_profiles
+import selector_stats
+from extractor import ProductFields, absolute_url, parse_rating
+from platforms import generate_search_url
+from platforms.common import (DELIVERY_RE, RESULTS_PER_PAGE, make_result, parse_price_text,
+                              price_from_class, priced_containers, product_log, product_title)
+
+log = logging.getLogger(__name__)
+
+# Product container selectors in default preference order;
+# selector_stats reorders them at runtime by recent hit rate
+CONTAINER_SELECTORS = [
+    ('s-search-result', lambda soup: soup.find_all('div', {'data-component-type': 's-search-result'})),
+    ('s-result-item', lambda soup: soup.find_all('div', class_='s-result-item')),
+    ('data-asin', lambda soup: soup.find_all('div', {'data-asin': True})),
+    ('data-index', lambda soup: soup.find_all('div', {'data-index': True})),
+]
+
+
+def _amazon_price_container(fields):
+    price_container = fields.first('span', 'a-price')
+    if not price_container:
+        return None
+    price_elem = price_container.find('span', class_='a-offscreen')
+    if not price_elem:
+        price_elem = price_container.find('span', class_='a-price-whole')
+    return parse_price_text(price_elem.get_text(strip=True)) if price_elem else None
+
+
+# Per-product price extraction methods over ProductFields, in default preference order
+AMAZON_PRICE_METHODS = [
+    ('a-price-whole', price_from_class('span', 'a-price-whole')),
+    ('a-offscreen', price_from_class('span', 'a-offscreen')),
+    ('a-price', _amazon_price_container),
+    ('rupee-scan', lambda fields: fields.rupee_price()),
+]
+
+
+def product_price(fields):
+    """Price by the first method that finds one, without recording selector stats"""
+    return next((price for price in (method(fields) for _, method in AMAZON_PRICE_METHODS) if price), None)
+
+AMAZON_LINK_RE = re.compile('/dp/|/gp/product/')
+AMAZON_DELIVERY_RE = re.compile('delivery|shipping|Get it|Prime', re.I)
+
+
+def scrape(query, page=1):
+    """Scrape Amazon.in for product prices, ratings, and delivery details"""
+    try:
+        url = generate_search_url('Amazon', query, page)
+
+        # Try with delay to avoid rate limiting
+        time.sleep(2)
+
+        # Best request profile first; a retry goes out as a different one
+        response = None
+        tried = []
+        for attempt in range(2):
+            profile = request_profiles.choose('Amazon', exclude=tried, mobile=False)
+            tried.append(profile.name)
+            try:
+                response = fetch_backends.fetch('Amazon', url, timeout=25, profile=profile)
+                # If we get a real page, break
+                if response.status_code == 200 and not block_pages.is_blocked(response):
+                    break
+                # If 503 or blocked, wait longer and try again
+                if attempt < 1:
+                    time.sleep(3)
+                    continue
+            except:
+                if attempt < 1:
+                    time.sleep(2)
+                    continue
+                return None
+
+        # Block pages are dropped here, before the page is decoded or parsed
+        if not block_pages.usable('Amazon', response):
+            return None
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+
+        # Try multiple selectors for Amazon products, best recent performer first
+        products, _ = selector_stats.first_match('Amazon', 'container', CONTAINER_SELECTORS, soup,
+                                                 accept=priced_containers(product_price))
+
+        products = (products or [])[:RESULTS_PER_PAGE]
+
+        for product in products:
+            try:
+                # Walk the product subtree once; everything below reads from this index
+                fields = ProductFields(product)
+
+                # Price extraction - try multiple methods, best recent performer first
+                price, _ = selector_stats.first_match('Amazon', 'price', AMAZON_PRICE_METHODS, fields)
+
+                # Only add if we found a price
+                if price and price > 0:
+                    # Rating extraction
+                    rating = parse_rating(fields.text('span', 'a-icon-alt'))
+
+                    # Try the rating text that follows the star icon
+                    if not rating:
+                        star_elem = fields.first('i', 'a-icon-star')
+                        if star_elem:
+                            rating_span = star_elem.find_next('span', class_='a-icon-alt')
+                            if rating_span:
+                                rating = parse_rating(rating_span.get_text(strip=True))
+
+                    # Delivery information: a delivery span, then an aria-label
+                    delivery = (
+                        fields.own_text_matching(AMAZON_DELIVERY_RE, min_length=5)
+                        or fields.aria_label_matching(DELIVERY_RE, min_length=5)
+                        or 'Free delivery on orders above ₹499'
+                    )[:50]
+
+                    # Product link
+                    link_elem = fields.link(AMAZON_LINK_RE)
+                    if not link_elem:
+                        h2 = fields.by_tag.get('h2')
+                        if h2:
+                            link_elem = h2.find('a')
+                    if not link_elem:
+                        link_elem = fields.link(class_name='a-link-normal')
+
+                    product_url = absolute_url(link_elem.get('href') if link_elem else None,
+                                               'https://www.amazon.in', url, strip_query=True)
+
+                    title = product_title(fields, ('h2', None), ('span', 'a-text-normal'))
+                    results.append(make_result(price, rating, delivery, product_url, title))
+            except Exception as e:
+                product_log.debug("Error processing Amazon product: %s", e, extra={'platform': 'Amazon'})
+                continue
+
+        return results if results else None
+    except Exception as e:
+        log.warning("Amazon scraping error: %s", e, extra={'platform': 'Amazon'})
+        return None
+
+
+def fallback(query):
+    """Retry the search as the mobile site when the regular scrape finds nothing"""
+    try:
+        mobile_url = generate_search_url('Amazon', query) + '&ref=sr_pg_1'
+        profile = request_profiles.choose('Amazon', mobile=True)
+        response = fetch_backends.fetch('Amazon', mobile_url, timeout=20, profile=profile)
+        if block_pages.usable('Amazon', response):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            products = soup.find_all('div', {'data-asin': True})[:3]
+            results = []
+            for product in products:
+                try:
+                    fields = ProductFields(product)
+                    price = fields.rupee_price()
+                    if price:
+                        rating = parse_rating(fields.text('span', 'a-icon-alt'))
+                        link_elem = fields.link(AMAZON_LINK_RE)
+                        product_url = mobile_url
+                        if link_elem and link_elem['href'].startswith('/'):
+                            product_url = 'https://www.amazon.in' + link_elem['href'].split('?')[0]
+
+                        results.append(make_result(price, rating, 'Free delivery on orders above ₹499', product_url))
+                except:
+                    continue
+            if results:
+                return results
+    except:
+        pass
+    return None
@@ -0,0 +1,104 @@
+"""Helpers shared by the platform scrapers
+
+Imported with the first scraper module, so it may depend on the parsing
+stack (bs4 via extractor) without slowing down startup.
+"""
+import logging
+import os
+import re
+
+import page_state
+import selector_stats
+from extractor import ProductFields, absolute_url
+
+log = logging.getLogger(__name__)
+# Per-product parse errors are on the hot path and sampled (see structured_log)
+product_log = logging.getLogger('scrape.product')
+
+# Products kept from each search results page
+RESULTS_PER_PAGE = int(os.environ.get('RESULTS_PER_PAGE', '5'))
+
+DELIVERY_RE = re.compile('delivery|shipping', re.I)
+PRICE_CLASS_RE = re.compile('price', re.I)
+PRODUCT_LINK_RE = re.compile('/product/')
+P_LINK_RE = re.compile('/p/')
+
+# Containers inspected when judging whether a container selector found products
+CONTAINER_SAMPLE = 3
+
+
+def priced_containers(price):
+    """Container-stage check for selector_stats.first_match: some of the first containers yield a price
+
+    price(fields) is the scraper's own price extraction. Selectors like
+    [data-asin] or .s-result-item also match ads and layout divs; only
+    containers the scraper can price count as a selector hit.
+    """
+    def accept(containers):
+        return any(price(ProductFields(container)) for container in containers[:CONTAINER_SAMPLE])
+    return accept
+
+
+def parse_price_text(text):
+    """Extract the first integer amount from a price string like '₹1,299'"""
+    match = re.search(r'(\d[\d,]*)', text.replace('₹', '').replace(',', ''))
+    return int(match.group(1)) if match else None
+
+
+def product_title(fields, *candidates, join=False):
+    """Listing title from the first (tag, class) candidate that has text
+
+    A class of None means the first tag of that kind. With join=True the
+    texts of all candidates are joined instead, e.g. brand + product name.
+    """
+    texts = []
+    for tag, class_name in candidates:
+        if class_name is None:
+            elem = fields.by_tag.get(tag)
+            text = elem.get_text(' ', strip=True) if elem is not None else None
+        else:
+            text = fields.text(tag, class_name)
+        if text:
+            texts.append(' '.join(text.split()))
+            if not join:
+                break
+    return ' '.join(texts)[:200] or None
+
+
+def make_result(price, rating, delivery, url, title=None):
+    """Format one scraped offer the way the results table expects it
+
+    price_value and rating_value carry the numbers behind the display
+    strings so offers can be filtered and ranked server-side; title is the
+    listing title used to match the same product across platforms.
+    """
+    has_rating = bool(rating) and rating != 'N/A'
+    return {
+        'price': f'₹{price:,}',
+        'rating': f"{rating} ⭐" if has_rating else '4.0 ⭐',
+        'delivery': delivery,
+        'url': url,
+        'price_value': price,
+        'rating_value': float(rating) if has_rating else None,
+        'title': title,
+    }
+
+
+def page_state_results(platform, html, origin, url, delivery):
+    """Results read from the page's embedded JSON state, or None to fall back to the markup"""
+    source, offers = page_state.extract_offers(platform, html, RESULTS_PER_PAGE)
+    selector_stats.stats.record(platform, 'page-state', 'embedded-json', bool(offers))
+    if not offers:
+        return None
+    log.debug("%s results read from %s", platform, source, extra={'platform': platform})
+    return [make_result(offer['price'], offer['rating'], delivery, absolute_url(offer['href'], origin, url),
+                        offer['title'])
+            for offer in offers]
+
+
+def price_from_class(tag, class_name):
+    """Build a price method that parses the first tag.class_name in a product"""
+    def method(fields):
+        price_text = fields.text(tag, class_name)
+        return parse_price_text(price_text) if price_text else None
+    return method
@@ -0,0 +1,97 @@
+"""Flipkart search results scraper"""
+import logging
+import re
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+import selector_stats
+from extractor import ProductFields, absolute_url, parse_rating
+from platforms import generate_search_url
+from platforms.common import (P_LINK_RE, RESULTS_PER_PAGE, make_result, page_state_results,
+                              price_from_class, priced_containers, product_log, product_title)
+
+log = logging.getLogger(__name__)
+
+# Product container selectors in default preference order;
+# selector_stats reorders them at runtime by recent hit rate
+CONTAINER_SELECTORS = [
+    ('_1AtVbE', lambda soup: soup.find_all('div', class_='_1AtVbE')),
+    ('data-id', lambda soup: soup.find_all('div', {'data-id': True})),
+    ('_2kHMtA', lambda soup: soup.find_all('div', class_='_2kHMtA')),
+    # Product links converted to their parent containers
+    ('_1fQZEK-parent', lambda soup: [a.parent for a in soup.find_all('a', class_='_1fQZEK', href=re.compile('/p/')) if a.parent]),
+]
+
+# Per-product price extraction methods over ProductFields, in default preference order
+FLIPKART_PRICE_METHODS = [
+    ('_30jeq3', price_from_class('div', '_30jeq3')),
+    ('_1_WHN1', price_from_class('div', '_1_WHN1')),
+    ('_25b18c', price_from_class('div', '_25b18c')),
+    ('rupee-scan', lambda fields: fields.rupee_price()),
+]
+
+
+def product_price(fields):
+    """Price by the first method that finds one, without recording selector stats"""
+    return next((price for price in (method(fields) for _, method in FLIPKART_PRICE_METHODS) if price), None)
+
+
+def scrape(query, page=1):
+    """Scrape Flipkart for product prices, ratings, and delivery details"""
+    try:
+        url = generate_search_url('Flipkart', query, page)
+        response = fetch_backends.fetch('Flipkart', url, timeout=15)
+
+        if not block_pages.usable('Flipkart', response):
+            return None
+
+        # Embedded page state is faster and sturdier than the obfuscated markup
+        results = page_state_results('Flipkart', response.text, 'https://www.flipkart.com', url, 'Free delivery')
+        if results:
+            return results
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+
+        # Try multiple selectors for Flipkart products, best recent performer first
+        products, _ = selector_stats.first_match('Flipkart', 'container', CONTAINER_SELECTORS, soup,
+                                                 accept=priced_containers(product_price))
+
+        products = (products or [])[:RESULTS_PER_PAGE]
+
+        for product in products:
+            try:
+                fields = ProductFields(product)
+
+                # Price extraction - try multiple methods, best recent performer first
+                price, _ = selector_stats.first_match('Flipkart', 'price', FLIPKART_PRICE_METHODS, fields)
+
+                # Only add if we found a price
+                if price and price > 0:
+                    # Rating extraction
+                    rating = parse_rating(fields.text('div', '_3LWZlK') or fields.text('span', '_2_R_DZ'))
+
+                    # Delivery information
+                    delivery = (
+                        fields.text('div', '_2TpdnF')
+                        or fields.own_text_matching(re.compile('delivery|free', re.I))
+                        or 'Free delivery'
+                    )[:50]
+
+                    # Product link
+                    link_elem = fields.link(class_name='_1fQZEK') or fields.link(P_LINK_RE) or fields.link()
+                    product_url = absolute_url(link_elem.get('href') if link_elem else None,
+                                               'https://www.flipkart.com', url, strip_query=True)
+
+                    title = product_title(fields, ('div', '_4rR01T'), ('a', 's1Q9rs'), ('a', 'IRpwTa'))
+                    results.append(make_result(price, rating, delivery, product_url, title))
+            except Exception as e:
+                product_log.debug("Error processing Flipkart product: %s", e, extra={'platform': 'Flipkart'})
+                continue
+
+        return results if results else None
+    except Exception as e:
+        log.warning("Flipkart scraping error: %s", e, extra={'platform': 'Flipkart'})
+        return None
@@ -0,0 +1,51 @@
+"""Last-resort price scan used when a platform's scraper finds nothing"""
+import re
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+from platforms import generate_search_url
+from platforms.common import make_result
+
+PRICE_PATTERNS = [
+    r'₹\s*(\d[\d,]*)',
+    r'Rs\.?\s*(\d[\d,]*)',
+    r'INR\s*(\d[\d,]*)',
+]
+
+
+def scan_prices(platform, query):
+    """Up to three distinct prices found anywhere on the search page, linking to it"""
+    try:
+        url = generate_search_url(platform, query)
+        response = fetch_backends.fetch(platform, url, timeout=20)
+
+        if block_pages.usable(platform, response):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            results = []
+
+            # Search for prices in the entire page
+            page_text = soup.get_text()
+            prices_found = []
+            for pattern in PRICE_PATTERNS:
+                matches = re.findall(pattern, page_text)
+                for match in matches:
+                    try:
+                        price = int(match.replace(',', ''))
+                        if 100 <= price <= 10000000:  # Reasonable price range
+                            prices_found.append(price)
+                    except:
+                        continue
+
+            # If we found prices, create results
+            if prices_found:
+                unique_prices = sorted(list(set(prices_found)))[:3]
+                for price in unique_prices:
+                    results.append(make_result(price, None, 'Free delivery', url))
+                if results:
+                    return results
+    except:
+        pass
+
+    return None
@@ -0,0 +1,87 @@
+"""Myntra search results scraper"""
+import logging
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+import selector_stats
+from extractor import ProductFields, absolute_url, parse_rating
+from platforms import generate_search_url
+from platforms.common import (RESULTS_PER_PAGE, make_result, page_state_results, parse_price_text,
+                              priced_containers, product_log, product_title)
+
+log = logging.getLogger(__name__)
+
+# Product container selectors in default preference order;
+# selector_stats reorders them at runtime by recent hit rate
+CONTAINER_SELECTORS = [
+    ('li.product-base', lambda soup: soup.find_all('li', class_='product-base')),
+    ('div.product-base', lambda soup: soup.find_all('div', class_='product-base')),
+]
+
+
+def product_price(fields):
+    """Price spans first, then any ₹ amount"""
+    price_text = fields.text('span', 'product-discountedPrice') or fields.text('span', 'product-price')
+    return parse_price_text(price_text) if price_text else fields.rupee_price()
+
+
+def scrape(query, page=1):
+    """Scrape Myntra for product prices, ratings, and delivery details"""
+    try:
+        url = generate_search_url('Myntra', query, page)
+        response = fetch_backends.fetch('Myntra', url, timeout=15)
+
+        if not block_pages.usable('Myntra', response):
+            return None
+
+        # Embedded page state is faster and sturdier than the obfuscated markup
+        results = page_state_results('Myntra', response.text, 'https://www.myntra.com', url, 'Free delivery above ₹799')
+        if results:
+            return results
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+
+        # Myntra product containers
+        products, _ = selector_stats.first_match('Myntra', 'container', CONTAINER_SELECTORS, soup,
+                                                 accept=priced_containers(product_price))
+
+        products = (products or [])[:RESULTS_PER_PAGE]
+
+        for product in products:
+            try:
+                fields = ProductFields(product)
+
+                # Price extraction - price spans first, then any ₹ amount
+                price = product_price(fields)
+
+                # Only add if we found a price
+                if price and price > 0:
+                    # Rating extraction
+                    rating = None
+                    ratings_container = fields.first('div', 'product-ratingsContainer')
+                    if ratings_container:
+                        rating_span = ratings_container.find('span')
+                        if rating_span:
+                            rating = parse_rating(rating_span.get_text(strip=True))
+
+                    # Delivery information
+                    delivery = (fields.text('div', 'product-deliveryInfo') or 'Free delivery above ₹799')[:50]
+
+                    # Product link
+                    link_elem = fields.link()
+                    product_url = absolute_url(link_elem.get('href') if link_elem else None,
+                                               'https://www.myntra.com', url)
+
+                    title = product_title(fields, ('h3', 'product-brand'), ('h4', 'product-product'), join=True)
+                    results.append(make_result(price, rating, delivery, product_url, title))
+            except Exception as e:
+                product_log.debug("Error processing Myntra product: %s", e, extra={'platform': 'Myntra'})
+                continue
+
+        return results if results else None
+    except Exception as e:
+        log.warning("Myntra scraping error: %s", e, extra={'platform': 'Myntra'})
+        return None
@@ -0,0 +1,66 @@
+"""ShopClues search results scraper"""
+import logging
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+import selector_stats
+from extractor import ProductFields, absolute_url, parse_rating
+from platforms import generate_search_url
+from platforms.common import (DELIVERY_RE, PRICE_CLASS_RE, PRODUCT_LINK_RE, RESULTS_PER_PAGE,
+                              make_result, parse_price_text, priced_containers, product_title)
+
+log = logging.getLogger(__name__)
+
+# Product container selectors in default preference order;
+# selector_stats reorders them at runtime by recent hit rate
+CONTAINER_SELECTORS = [
+    ('product', lambda soup: soup.find_all('div', class_='product')),
+    ('product-item', lambda soup: soup.find_all('div', class_='product-item')),
+]
+
+
+def product_price(fields):
+    price_elem = fields.first('span', 'p_price') or fields.first_matching('span', PRICE_CLASS_RE)
+    return parse_price_text(price_elem.get_text(strip=True)) if price_elem else None
+
+
+def scrape(query, page=1):
+    """Scrape ShopClues for product prices, ratings, and delivery details"""
+    try:
+        url = generate_search_url('ShopClues', query, page)
+        response = fetch_backends.fetch('ShopClues', url, timeout=15)
+
+        if not block_pages.usable('ShopClues', response):
+            return None
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+
+        products, _ = selector_stats.first_match('ShopClues', 'container', CONTAINER_SELECTORS, soup,
+                                                 accept=priced_containers(product_price))
+
+        products = (products or [])[:RESULTS_PER_PAGE]
+
+        for product in products:
+            try:
+                fields = ProductFields(product)
+                price = product_price(fields)
+
+                if price and price > 0:
+                    rating = parse_rating(fields.text('div', 'rating'))
+                    delivery = (fields.own_text_matching(DELIVERY_RE) or 'Free delivery')[:50]
+
+                    link_elem = fields.link(PRODUCT_LINK_RE)
+                    product_url = absolute_url(link_elem.get('href') if link_elem else None,
+                                               'https://www.shopclues.com', url)
+
+                    title = product_title(fields, ('h2', None))
+                    results.append(make_result(price, rating, delivery, product_url, title))
+            except:
+                continue
+
+        return results if results else None
+    except:
+        return None
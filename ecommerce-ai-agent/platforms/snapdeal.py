@@ -0,0 +1,73 @@
+"""Snapdeal search results scraper"""
+import logging
+import re
+
+from bs4 import BeautifulSoup
+
+import block_pages
+import fetch_backends
+import selector_stats
+from extractor import ProductFields, absolute_url
+from platforms import generate_search_url
+from platforms.common import (DELIVERY_RE, PRODUCT_LINK_RE, RESULTS_PER_PAGE, make_result,
+                              price_from_class, priced_containers, product_title)
+
+log = logging.getLogger(__name__)
+
+# Product container selectors in default preference order;
+# selector_stats reorders them at runtime by recent hit rate
+CONTAINER_SELECTORS = [
+    ('product-tuple-listing', lambda soup: soup.find_all('div', class_='product-tuple-listing')),
+    ('data-dp-id', lambda soup: soup.find_all('div', {'data-dp-id': True})),
+]
+
+
+# Snapdeal writes "Rs. 1,299"
+product_price = price_from_class('span', 'product-price')
+
+
+def scrape(query, page=1):
+    """Scrape Snapdeal for product prices, ratings, and delivery details"""
+    try:
+        url = generate_search_url('Snapdeal', query, page)
+        response = fetch_backends.fetch('Snapdeal', url, timeout=15)
+
+        if not block_pages.usable('Snapdeal', response):
+            return None
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+
+        products, _ = selector_stats.first_match('Snapdeal', 'container', CONTAINER_SELECTORS, soup,
+                                                 accept=priced_containers(product_price))
+
+        products = (products or [])[:RESULTS_PER_PAGE]
+
+        for product in products:
+            try:
+                fields = ProductFields(product)
+                price = product_price(fields)
+
+                if price and price > 0:
+                    # Star rating is rendered as a width percentage
+                    rating = 'N/A'
+                    rating_elem = fields.first('div', 'filled-stars')
+                    if rating_elem:
+                        rating_match = re.search(r'width:\s*(\d+)%', rating_elem.get('style', ''))
+                        if rating_match:
+                            rating = f"{int(rating_match.group(1)) / 20:.1f}"
+
+                    delivery = (fields.own_text_matching(DELIVERY_RE) or 'Free delivery')[:50]
+
+                    link_elem = fields.link(PRODUCT_LINK_RE)
+                    product_url = absolute_url(link_elem.get('href') if link_elem else None,
+                                               'https://www.snapdeal.com', url)
+
+                    title = product_title(fields, ('p', 'product-title'))
+                    results.append(make_result(price, rating, delivery, product_url, title))
+            except:
+                continue
+
+        return results if results else None
+    except:
+        return None
@@ -0,0 +1,90 @@
+"""Background prewarming of the result cache from the popular-query log
+
+On startup and then every PREWARM_INTERVAL seconds, the top PREWARM_TOP_N
+queries are re-scraped on each platform whose cached results are missing or
+about to expire. The prewarmer runs on a single low-priority thread and only
+touches a host while its rate budget has headroom to spare, so interactive
+searches always get the tokens first.
+"""
+import logging
+import os
+import threading
+import time
+
+import cache
+import rate_limit
+import structured_log
+from query_log import query_log
+
+log = logging.getLogger(__name__)
+
+PREWARM_ENABLED = os.environ.get('PREWARM_ENABLED', '1') == '1'
+PREWARM_TOP_N = int(os.environ.get('PREWARM_TOP_N', '20'))
+PREWARM_INTERVAL = float(os.environ.get('PREWARM_INTERVAL', '600'))
+# Pause between prewarm scrapes
+PREWARM_PAUSE = float(os.environ.get('PREWARM_PAUSE', '2'))
+# Tokens that must stay in a host's bucket after a prewarm fetch
+PREWARM_RESERVE = float(os.environ.get('PREWARM_RESERVE', str(rate_limit.HOST_BURST / 2)))
+# Refresh entries whose remaining TTL is below this many seconds
+PREWARM_REFRESH_MARGIN = float(os.environ.get('PREWARM_REFRESH_MARGIN', str(cache.RESULT_CACHE_TTL / 4)))
+
+
+class Prewarmer:
+    """Refreshes popular (platform, query) pairs through refresh(platform, query)"""
+
+    def __init__(self, refresh, platforms, host_for, top_n=PREWARM_TOP_N, interval=PREWARM_INTERVAL,
+                 pause=PREWARM_PAUSE, reserve=PREWARM_RESERVE, refresh_margin=PREWARM_REFRESH_MARGIN):
+        self.refresh = refresh
+        self.platforms = list(platforms)
+        self.host_for = host_for
+        self.top_n = top_n
+        self.interval = interval
+        self.pause = pause
+        self.reserve = reserve
+        self.refresh_margin = refresh_margin
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_run = None
+
+    def run_once(self):
+        """One prewarm pass; returns counts of refreshed, fresh and deferred pairs"""
+        counts = {'refreshed': 0, 'fresh': 0, 'deferred': 0, 'failed': 0}
+        for query, _ in query_log.top(self.top_n):
+            for platform in self.platforms:
+                if self.stop_event.is_set():
+                    return counts
+                if cache.result_cache.ttl_remaining(platform, query) > self.refresh_margin \
+                        or cache.negative_cache.get(platform, query):
+                    counts['fresh'] += 1
+                    continue
+                if rate_limit.limiter.available(self.host_for(platform)) < 1 + self.reserve:
+                    # Interactive traffic is using this host; catch it next pass
+                    counts['deferred'] += 1
+                    continue
+                try:
+                    self.refresh(platform, query)
+                    counts['refreshed'] += 1
+                except Exception as e:
+                    log.warning("Prewarm of %s %r failed: %s", platform, query, e, extra={'platform': platform})
+                    counts['failed'] += 1
+                self.stop_event.wait(self.pause)
+        query_log.save()
+        return counts
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            with structured_log.trace(f'prewarm-{structured_log.new_trace_id()[:8]}'):
+                counts = self.run_once()
+            self.last_run = {'seconds': round(time.perf_counter() - start, 1), **counts}
+            log.info("Prewarm pass finished", extra=self.last_run)
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        if self.thread is not None or not PREWARM_ENABLED:
+            return
+        self.thread = threading.Thread(target=self._loop, name='prewarmer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,192 @@
+"""Opt-in profiling and slow-search capture for search_products"""
+import cProfile
+import contextvars
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Fraction of searches to profile automatically (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+# A request carrying this header with the PROFILE_TOKEN value is always profiled
+PROFILE_HEADER = 'X-Profile-Search'
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '20'))
+
+# Searches slower than this many seconds get their per-platform breakdown logged
+SLOW_SEARCH_THRESHOLD = float(os.environ.get('SLOW_SEARCH_THRESHOLD', '15'))
+SLOW_SEARCH_LOG_BYTES = int(os.environ.get('SLOW_SEARCH_LOG_BYTES', str(1024 * 1024)))
+SLOW_SEARCH_LOG_BACKUPS = int(os.environ.get('SLOW_SEARCH_LOG_BACKUPS', '5'))
+
+# cProfile and tracemalloc are process-wide, so only one capture may run at a time
+_capture_lock = threading.Lock()
+# Profilers of work the capturing request handed to other threads (see profile_task)
+_task_profilers = contextvars.ContextVar('task_profilers', default=None)
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+def should_profile(headers=None):
+    """Decide whether the current search should be captured"""
+    if PROFILE_TOKEN and headers is not None and headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _capture_name(query):
+    slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-')[:40] or 'search'
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{slug}"
+
+
+def _rotate_captures():
+    """Keep only the newest PROFILE_MAX_FILES captures in PROFILE_DIR"""
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if n.endswith('.prof')]
+    except OSError:
+        return
+    names.sort()
+    excess = len(names) - max(PROFILE_MAX_FILES, 1)
+    for name in names[:max(excess, 0)]:
+        base = os.path.join(PROFILE_DIR, name[:-len('.prof')])
+        for suffix in ('.prof', '.txt'):
+            try:
+                os.remove(base + suffix)
+            except OSError:
+                pass
+
+
+def _write_capture(query, platforms, profiler, task_profilers, snapshot, elapsed):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, _capture_name(query))
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    for task_profiler in task_profilers:
+        stats.add(task_profiler)
+    stats.dump_stats(base + '.prof')
+
+    report.write(f'query: {query}\nplatforms: {", ".join(platforms)}\nelapsed: {elapsed:.3f}s\n\n')
+    stats.sort_stats('cumulative').print_stats(40)
+    if snapshot is not None:
+        report.write('\nTop allocations (tracemalloc):\n')
+        for stat in snapshot.statistics('lineno')[:25]:
+            report.write(f'{stat}\n')
+    with open(base + '.txt', 'w', encoding='utf-8') as fh:
+        fh.write(report.getvalue())
+
+    _rotate_captures()
+    return base
+
+
+@contextmanager
+def capture(query, platforms, enabled=True):
+    """Run the enclosed block under cProfile and tracemalloc when enabled"""
+    if not enabled or not _capture_lock.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    task_profilers = []
+    started_tracemalloc = not tracemalloc.is_tracing()
+    start = time.perf_counter()
+    try:
+        if started_tracemalloc:
+            tracemalloc.start()
+        token = _task_profilers.set(task_profilers)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _task_profilers.reset(token)
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            if started_tracemalloc:
+                tracemalloc.stop()
+            try:
+                path = _write_capture(query, platforms, profiler, list(task_profilers), snapshot,
+                                      time.perf_counter() - start)
+                log.info("Profile captured for %r: %s.prof", query, path)
+            except Exception as e:
+                log.warning("Failed to write profile capture: %s", e)
+    finally:
+        _capture_lock.release()
+
+
+@contextmanager
+def profile_task():
+    """Profile the enclosed block into the active capture, if any, on whichever thread runs it
+
+    cProfile only sees the thread that enabled it, so work a captured search
+    submits to pool threads (with its context copied) is profiled per task
+    and merged into the capture when it is written. Python 3.12+ allows only
+    one active profiler per process, which already sees every thread, so
+    there the task just runs under the capture's profiler.
+    """
+    task_profilers = _task_profilers.get()
+    if task_profilers is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # 'Another profiling tool is already active'; profiling must never fail the task
+        profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            task_profilers.append(profiler)
+
+
+def _get_slow_logger():
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(PROFILE_DIR, 'slow_searches.jsonl'),
+                maxBytes=SLOW_SEARCH_LOG_BYTES,
+                backupCount=SLOW_SEARCH_LOG_BACKUPS,
+                encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('ecommerce.slow_search')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _slow_logger = logger
+        return _slow_logger
+
+
+def record_search(query, breakdown, elapsed):
+    """Log the per-platform breakdown of a search that exceeded SLOW_SEARCH_THRESHOLD
+
+    ``breakdown`` maps platform name to a dict with at least ``seconds``.
+    """
+    if elapsed < SLOW_SEARCH_THRESHOLD:
+        return False
+    entry = {
+        'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'query': query,
+        'elapsed': round(elapsed, 3),
+        'threshold': SLOW_SEARCH_THRESHOLD,
+        'platforms': breakdown,
+    }
+    try:
+        _get_slow_logger().info(json.dumps(entry, ensure_ascii=False))
+    except Exception as e:
+        log.warning("Failed to write slow-search log: %s", e)
+        return False
+    return True
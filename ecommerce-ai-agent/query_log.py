@@ -0,0 +1,98 @@
+"""Compact frequency log of normalized search queries
+
+Counts are kept in memory and periodically saved as a small JSON object.
+When the log grows past QUERY_LOG_MAX_ENTRIES all counts are halved and
+the rarest queries dropped, so old trends fade and the file stays small.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from cache import normalize_query
+
+log = logging.getLogger(__name__)
+
+QUERY_LOG_PATH = os.environ.get('QUERY_LOG_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_log.json'))
+QUERY_LOG_MAX_ENTRIES = int(os.environ.get('QUERY_LOG_MAX_ENTRIES', '2000'))
+QUERY_LOG_SAVE_EVERY = int(os.environ.get('QUERY_LOG_SAVE_EVERY', '20'))
+# Queries longer than this are not worth prewarming or suggesting
+MAX_QUERY_LENGTH = 100
+
+
+class QueryLog:
+    def __init__(self, path=QUERY_LOG_PATH, max_entries=QUERY_LOG_MAX_ENTRIES, save_every=QUERY_LOG_SAVE_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self.lock = threading.Lock()
+        # Held for a whole save, so a slow write is never overtaken by an older snapshot
+        self.save_lock = threading.Lock()
+        self.counts = Counter()
+        self.unsaved = 0
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            with self.lock:
+                self.counts = Counter({q: float(c) for q, c in data.items() if isinstance(q, str)})
+        except (OSError, ValueError, AttributeError) as e:
+            log.warning("Could not load query log %s: %s", self.path, e)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.save_lock:
+            with self.lock:
+                data = dict(self.counts)
+                self.unsaved = 0
+            # A temp file of its own, since other worker processes may be saving the same log
+            directory, name = os.path.split(os.path.abspath(self.path))
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+                with open(fd, 'w', encoding='utf-8') as fh:
+                    json.dump(data, fh, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                log.warning("Could not save query log %s: %s", self.path, e)
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _compact(self):
+        for query in list(self.counts):
+            self.counts[query] /= 2
+        for query, _ in self.counts.most_common()[self.max_entries // 2:]:
+            del self.counts[query]
+        for query in [q for q, c in self.counts.items() if c < 0.5]:
+            del self.counts[query]
+
+    def record(self, query):
+        query = normalize_query(query)
+        if not query or len(query) > MAX_QUERY_LENGTH:
+            return
+        with self.lock:
+            self.counts[query] += 1
+            if len(self.counts) > self.max_entries:
+                self._compact()
+            self.unsaved += 1
+            should_save = self.unsaved >= self.save_every
+            if should_save:
+                # Only this thread saves; the others keep counting towards the next save
+                self.unsaved = 0
+        if should_save:
+            self.save()
+
+    def top(self, n):
+        """The n most frequent queries as (query, count) pairs"""
+        with self.lock:
+            return self.counts.most_common(n)
+
+
+query_log = QueryLog()
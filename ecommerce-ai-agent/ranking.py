@@ -0,0 +1,101 @@
+"""Server-side filtering, sorting and top-K merge of offers across platforms"""
+import heapq
+import itertools
+import math
+import os
+
+DEFAULT_TOP_K = int(os.environ.get('RANKED_TOP_K', '10'))
+MAX_TOP_K = int(os.environ.get('RANKED_MAX_TOP_K', '100'))
+
+# Sort keys for heapq.nsmallest; unrated offers sort as 0 stars. 'relevance' has
+# no key: offers keep the order the platforms listed them in
+SORT_ORDERS = {
+    'price_asc': lambda offer: (offer['price_value'], -(offer.get('rating_value') or 0)),
+    'price_desc': lambda offer: (-offer['price_value'], -(offer.get('rating_value') or 0)),
+    'rating_desc': lambda offer: (-(offer.get('rating_value') or 0), offer['price_value']),
+}
+SORT_LABELS = {
+    'relevance': 'By platform',
+    'price_asc': 'Price: low to high',
+    'price_desc': 'Price: high to low',
+    'rating_desc': 'Rating: high to low',
+}
+
+
+def _number(values, name, cast):
+    raw = (values.get(name) or '').strip()
+    if not raw:
+        return None
+    try:
+        value = cast(raw.replace(',', '').replace('₹', ''))
+    except ValueError:
+        raise ValueError(f'Invalid {name.replace("_", " ")}: {raw}')
+    # float() accepts 'nan' and 'inf', which would disable the filter and break the JSON echo
+    if not math.isfinite(value):
+        raise ValueError(f'Invalid {name.replace("_", " ")}: {raw}')
+    if value < 0:
+        raise ValueError(f'{name.replace("_", " ").capitalize()} cannot be negative')
+    return value
+
+
+def parse_filters(values):
+    """Read min_price, max_price, min_rating, sort and top_k from request values
+
+    Returns None when no filtering or ranking was requested, so callers keep
+    the plain per-platform view. Raises ValueError on bad input.
+    """
+    filters = {
+        'min_price': _number(values, 'min_price', int),
+        'max_price': _number(values, 'max_price', int),
+        'min_rating': _number(values, 'min_rating', float),
+        'sort': (values.get('sort') or 'relevance').strip(),
+        'top_k': _number(values, 'top_k', int),
+    }
+    if filters['sort'] not in SORT_LABELS:
+        raise ValueError(f'Unknown sort order: {filters["sort"]}')
+    if filters['min_price'] is not None and filters['max_price'] is not None \
+            and filters['min_price'] > filters['max_price']:
+        raise ValueError('Minimum price cannot exceed maximum price')
+    if filters['min_rating'] is not None and filters['min_rating'] > 5:
+        raise ValueError('Minimum rating cannot exceed 5')
+    if filters['top_k'] is not None:
+        filters['top_k'] = max(1, min(filters['top_k'], MAX_TOP_K))
+
+    if all(filters[key] is None for key in ('min_price', 'max_price', 'min_rating', 'top_k')) \
+            and filters['sort'] == 'relevance':
+        return None
+    return filters
+
+
+def matches(result, filters):
+    """Whether one result row passes the price and rating filters"""
+    price = result.get('price_value')
+    # Placeholder rows ("Click to view") have no numeric price
+    if price is None:
+        return False
+    if filters['min_price'] is not None and price < filters['min_price']:
+        return False
+    if filters['max_price'] is not None and price > filters['max_price']:
+        return False
+    if filters['min_rating'] is not None and (result.get('rating_value') or 0) < filters['min_rating']:
+        return False
+    return True
+
+
+def _matching_offers(platforms_data, filters):
+    for block in platforms_data:
+        for result in block['results']:
+            if matches(result, filters):
+                yield dict(result, platform=block['platform'])
+
+
+def rank_offers(platforms_data, filters):
+    """Filter offers from every platform and return the best top_k in sort order"""
+    offers = _matching_offers(platforms_data, filters)
+    top_k = filters['top_k'] or DEFAULT_TOP_K
+    key = SORT_ORDERS.get(filters['sort'])
+    if key is None:
+        # Relevance: platforms in the order searched, each in its own ranking
+        return list(itertools.islice(offers, top_k))
+    # O(n log k): only the current best K offers are ever held in the heap
+    return heapq.nsmallest(top_k, offers, key=key)
@@ -0,0 +1,83 @@
+"""Per-host token-bucket rate budget for outbound requests"""
+import os
+import threading
+import time
+
+# Sustained requests per second and burst size allowed to each retailer host
+HOST_RATE = float(os.environ.get('HOST_RATE', '2'))
+HOST_BURST = float(os.environ.get('HOST_BURST', '6'))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    """One token bucket per host (or any other key), created on first use"""
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def _bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def try_acquire(self, host, tokens=1.0, reserve=0.0):
+        """Take tokens only if at least `reserve` tokens would remain afterwards"""
+        with self.lock:
+            bucket = self._bucket(host)
+            bucket._refill(time.monotonic())
+            if bucket.tokens - tokens >= reserve:
+                bucket.tokens -= tokens
+                return True
+            return False
+
+    def available(self, host):
+        """Tokens currently available for host"""
+        with self.lock:
+            bucket = self._bucket(host)
+            bucket._refill(time.monotonic())
+            return bucket.tokens
+
+    def seconds_until(self, host, tokens=1.0):
+        """How long until host has tokens available"""
+        with self.lock:
+            bucket = self._bucket(host)
+            bucket._refill(time.monotonic())
+            missing = tokens - bucket.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float('inf')
+
+    def prune(self):
+        """Forget buckets that have refilled completely; they behave like new ones"""
+        with self.lock:
+            now = time.monotonic()
+            for host in list(self.buckets):
+                bucket = self.buckets[host]
+                bucket._refill(now)
+                if bucket.tokens >= bucket.burst:
+                    del self.buckets[host]
+
+    def snapshot(self):
+        with self.lock:
+            now = time.monotonic()
+            for bucket in self.buckets.values():
+                bucket._refill(now)
+            return {host: round(bucket.tokens, 2) for host, bucket in self.buckets.items()}
+
+
+limiter = HostRateLimiter()
@@ -0,0 +1,182 @@
+"""Per-platform pools of request profiles ranked by how well they get through
+
+A profile is one consistent browser identity: a User-Agent with the
+Accept/Sec-Fetch headers that browser really sends, plus any cookies the
+platform expects (Amazon's session-id). Each platform has its own copy of
+every profile, since a fingerprint one site flags may be fine on another.
+fetch_backends credits the outcome of every first-tier fetch to the
+profile it went out as, keeping an exponentially weighted success rate and
+latency. choose() hands out the best profile up front, so a flagged
+fingerprint is dropped after a few blocks instead of being retried, and
+every PROFILE_EXPLORE_EVERY picks a different profile is re-checked.
+"""
+import os
+import random
+import threading
+
+import block_pages
+
+PROFILE_DECAY = float(os.environ.get('PROFILE_DECAY', '0.8'))
+PROFILE_EXPLORE_EVERY = int(os.environ.get('PROFILE_EXPLORE_EVERY', '20'))
+# Success rate assumed for profiles that have not been tried yet
+PRIOR_SUCCESS_RATE = 0.5
+# Success rates this close count as a tie, broken by latency
+SUCCESS_RATE_TOLERANCE = 0.02
+
+# Outcomes besides the block_pages labels
+TIMEOUT = 'timeout'
+FAILED = 'failed'
+
+_NAVIGATION_HEADERS = {
+    'Accept-Language': 'en-IN,en-US;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+}
+_CHROME_ACCEPT = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8'
+
+# Browser identities in default preference order; the first is what every scraper used to send
+BROWSERS = {
+    'chrome-windows': dict(_NAVIGATION_HEADERS, **{
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': _CHROME_ACCEPT,
+        'Cache-Control': 'max-age=0',
+    }),
+    'firefox-windows': dict(_NAVIGATION_HEADERS, **{
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-IN,en-US;q=0.7,en;q=0.3',
+    }),
+    'chrome-android': dict(_NAVIGATION_HEADERS, **{
+        'User-Agent': 'Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
+        'Accept': _CHROME_ACCEPT,
+        'Sec-CH-UA-Mobile': '?1',
+    }),
+    'safari-iphone': dict(_NAVIGATION_HEADERS, **{
+        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    }),
+}
+MOBILE_BROWSERS = {'chrome-android', 'safari-iphone'}
+
+# Headers a platform's pages expect on top of the browser's own
+PLATFORM_HEADERS = {
+    'Amazon': {'Referer': 'https://www.amazon.in/', 'Origin': 'https://www.amazon.in'},
+}
+
+
+def _amazon_cookies(rng):
+    # One made-up session per profile, kept for the life of the process like a real browser's
+    session_id = f'{rng.randint(100, 999)}-{rng.randint(1000000, 9999999)}-{rng.randint(1000000, 9999999)}'
+    return {'session-id': session_id, 'session-id-time': '2082787201l'}
+
+
+# Cookie factories, called once per (platform, profile)
+PLATFORM_COOKIES = {
+    'Amazon': _amazon_cookies,
+}
+
+
+def default_headers():
+    """Headers of the default browser profile, for requests not tied to a platform"""
+    return dict(next(iter(BROWSERS.values())))
+
+
+class RequestProfile:
+    """One browser identity on one platform, with its track record"""
+
+    def __init__(self, platform, name, headers, cookies, decay=PROFILE_DECAY):
+        self.platform = platform
+        self.name = name
+        self.headers = headers
+        self.cookies = cookies
+        self.mobile = name in MOBILE_BROWSERS
+        self.decay = decay
+        self.lock = threading.Lock()
+        self.success_rate = PRIOR_SUCCESS_RATE
+        self.latency = None
+        self.counts = {'requests': 0, 'ok': 0, 'blocked': 0, 'failed': 0}
+
+    def record(self, outcome, latency=None):
+        """Credit one fetch: a block_pages label, TIMEOUT or FAILED (exception)"""
+        with self.lock:
+            self.counts['requests'] += 1
+            if outcome == block_pages.OK:
+                self.counts['ok'] += 1
+            elif outcome in block_pages.BLOCKED_LABELS:
+                self.counts['blocked'] += 1
+            else:
+                self.counts['failed'] += 1
+            success = 1.0 if outcome == block_pages.OK else 0.0
+            self.success_rate = self.decay * self.success_rate + (1 - self.decay) * success
+            if latency is not None:
+                self.latency = latency if self.latency is None \
+                    else self.decay * self.latency + (1 - self.decay) * latency
+
+    def rank_key(self):
+        with self.lock:
+            return (-round(self.success_rate / SUCCESS_RATE_TOLERANCE), self.latency or 0.0)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts, success_rate=round(self.success_rate, 3),
+                        avg_latency=round(self.latency, 3) if self.latency is not None else None)
+
+
+class ProfilePool:
+    """Request profiles per platform, handed out best-first"""
+
+    def __init__(self, browsers=BROWSERS, explore_every=PROFILE_EXPLORE_EVERY, seed=None):
+        self.browsers = browsers
+        self.explore_every = explore_every
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # platform -> [RequestProfile] in default preference order
+        self.profiles = {}
+        self.picks = {}
+
+    def _profiles(self, platform):
+        with self.lock:
+            profiles = self.profiles.get(platform)
+            if profiles is None:
+                extra_headers = PLATFORM_HEADERS.get(platform, {})
+                make_cookies = PLATFORM_COOKIES.get(platform)
+                profiles = self.profiles[platform] = [
+                    RequestProfile(platform, name, dict(headers, **extra_headers),
+                                   make_cookies(self.rng) if make_cookies else {})
+                    for name, headers in self.browsers.items()
+                ]
+            return profiles
+
+    def choose(self, platform, exclude=(), mobile=None):
+        """Best profile for platform, skipping names in exclude; mobile=True/False narrows the choice
+
+        Every explore_every-th pick cycles through the alternatives instead,
+        so a demoted profile gets re-measured once the site relents.
+        """
+        candidates = [profile for profile in self._profiles(platform)
+                      if mobile is None or profile.mobile == mobile]
+        # Once every candidate has been tried, start over rather than switch device type
+        candidates = [profile for profile in candidates if profile.name not in exclude] or candidates
+        with self.lock:
+            picks = self.picks.get(platform, 0) + 1
+            self.picks[platform] = picks
+        if self.explore_every and picks % self.explore_every == 0:
+            return candidates[(picks // self.explore_every) % len(candidates)]
+        return min(candidates, key=lambda profile: profile.rank_key())
+
+    def snapshot(self):
+        with self.lock:
+            platforms = dict(self.profiles)
+        return {platform: {profile.name: profile.snapshot() for profile in profiles}
+                for platform, profiles in platforms.items()}
+
+
+pool = ProfilePool()
+
+
+def choose(platform, exclude=(), mobile=None):
+    return pool.choose(platform, exclude, mobile)
@@ -0,0 +1,75 @@
+"""Adaptive ordering of scraper selector variants by recent hit rate
+
+Scrapers keep several fallback selectors per extraction stage (product
+containers, price methods, ...). Trying them in a fixed order means every
+page pays for the misses ahead of whichever variant the site currently
+uses. Here each (platform, stage) tracks an exponentially weighted hit rate
+per variant and attempts are reordered best-first, with the static order
+restored every SELECTOR_EXPLORE_EVERY calls so demoted variants get
+re-checked when a site changes its markup.
+"""
+import os
+import threading
+
+SELECTOR_DECAY = float(os.environ.get('SELECTOR_DECAY', '0.9'))
+SELECTOR_EXPLORE_EVERY = int(os.environ.get('SELECTOR_EXPLORE_EVERY', '50'))
+# Hit rate assumed for variants that have not been tried yet
+PRIOR_HIT_RATE = 0.5
+
+
+class SelectorStats:
+    """Thread-safe per-(platform, stage) hit-rate tracker"""
+
+    def __init__(self, decay=SELECTOR_DECAY, explore_every=SELECTOR_EXPLORE_EVERY):
+        self.decay = decay
+        self.explore_every = explore_every
+        self.lock = threading.Lock()
+        self.rates = {}
+        self.calls = {}
+
+    def order(self, platform, stage, names):
+        """Return names sorted by hit rate, or in static order when exploring"""
+        key = (platform, stage)
+        with self.lock:
+            calls = self.calls.get(key, 0) + 1
+            self.calls[key] = calls
+            if self.explore_every and calls % self.explore_every == 0:
+                return list(names)
+            rates = self.rates.get(key, {})
+            ranked = sorted(enumerate(names), key=lambda item: (-rates.get(item[1], PRIOR_HIT_RATE), item[0]))
+        return [name for _, name in ranked]
+
+    def record(self, platform, stage, name, hit):
+        with self.lock:
+            rates = self.rates.setdefault((platform, stage), {})
+            previous = rates.get(name, PRIOR_HIT_RATE)
+            rates[name] = self.decay * previous + (1 - self.decay) * (1.0 if hit else 0.0)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                f'{platform}/{stage}': {name: round(rate, 3) for name, rate in rates.items()}
+                for (platform, stage), rates in self.rates.items()
+            }
+
+
+stats = SelectorStats()
+
+
+def first_match(platform, stage, variants, target, accept=bool):
+    """Apply (name, fn) variants to target in adaptive order; return (result, name) of the first hit
+
+    A hit is a result accept() approves: by default any truthy extracted
+    value. Container stages pass a stricter check, since a broad selector
+    that matches layout divs is not a hit just for matching something.
+    Every variant tried is recorded, so misses push a variant down the
+    order for subsequent pages.
+    """
+    by_name = dict(variants)
+    for name in stats.order(platform, stage, [name for name, _ in variants]):
+        result = by_name[name](target)
+        hit = bool(result) and bool(accept(result))
+        stats.record(platform, stage, name, hit)
+        if hit:
+            return result, name
+    return None, None
@@ -0,0 +1,105 @@
+"""Import-time accounting for startup and lazily loaded components
+
+install() puts a finder at the front of sys.meta_path that times every
+outermost module import from then on: importing flask counts werkzeug and
+jinja2 towards "flask", and a platform plugin counts bs4 towards
+"platforms.amazon". mark_ready() ends the startup phase, so the report
+separates what every worker pays at spawn from what is paid on first use.
+"""
+import importlib.machinery
+import logging
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Loaders that are created per module, so wrapping one instance times one module
+_PER_MODULE_LOADERS = (
+    importlib.machinery.SourceFileLoader,
+    importlib.machinery.SourcelessFileLoader,
+    importlib.machinery.ExtensionFileLoader,
+)
+
+_started = time.perf_counter()
+_ready_seconds = None
+_lock = threading.Lock()
+# component -> (phase, seconds)
+_timings = {}
+_local = threading.local()
+
+
+def _record(name, seconds):
+    phase = 'startup' if _ready_seconds is None else 'lazy'
+    package = name.partition('.')[0]
+    with _lock:
+        # concurrent.futures after concurrent, pyarrow.parquet after pyarrow, ...
+        if package in _timings and _timings[package][0] == phase:
+            _timings[package] = (phase, _timings[package][1] + seconds)
+        else:
+            _timings[name] = (phase, seconds)
+
+
+class _TimingFinder:
+    """Finds modules with the other finders and times the outermost executions"""
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if isinstance(spec.loader, _PER_MODULE_LOADERS):
+            spec.loader.exec_module = self._timed(name, spec.loader.exec_module)
+        return spec
+
+    @staticmethod
+    def _timed(name, exec_module):
+        def timed_exec_module(module):
+            depth = getattr(_local, 'depth', 0)
+            _local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                _local.depth = depth
+                if depth == 0:
+                    _record(name, time.perf_counter() - start)
+        return timed_exec_module
+
+
+_finder = _TimingFinder()
+
+
+def install():
+    """Start timing imports; call before the imports worth measuring"""
+    if _finder not in sys.meta_path:
+        sys.meta_path.insert(0, _finder)
+
+
+def mark_ready():
+    """End the startup phase and log where its import time went"""
+    global _ready_seconds
+    if _ready_seconds is None:
+        _ready_seconds = time.perf_counter() - _started
+        summary = report()
+        log.info("Started in %.0f ms, %.0f ms of it importing", _ready_seconds * 1000,
+                 sum(summary['startup_imports_ms'].values()), extra=summary)
+
+
+def _milliseconds(phase):
+    with _lock:
+        items = [(name, seconds) for name, (p, seconds) in _timings.items() if p == phase]
+    return {name: round(seconds * 1000, 1) for name, seconds in sorted(items, key=lambda item: -item[1])}
+
+
+def report():
+    """Startup duration and per-component import milliseconds, slowest first"""
+    return {
+        'startup_ms': round(_ready_seconds * 1000, 1) if _ready_seconds is not None else None,
+        'startup_imports_ms': _milliseconds('startup'),
+        'lazy_imports_ms': _milliseconds('lazy'),
+    }
@@ -0,0 +1,140 @@
+"""Non-blocking structured logging with per-search trace IDs
+
+Log calls only enqueue a LogRecord onto a bounded queue; a single
+QueueListener thread formats and writes them. When the queue is full
+records are dropped (and counted) rather than blocking a scraper thread.
+Every record carries the trace ID of the search that produced it.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+# Fraction of hot-path records (per-product parse errors) that are kept
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))
+# Loggers whose records are sampled at LOG_SAMPLE_RATE
+SAMPLED_LOGGERS = ('scrape.product',)
+
+trace_id_var = contextvars.ContextVar('trace_id', default='-')
+
+# LogRecord attributes that are not user-supplied extras
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'trace_id'}
+
+_listener = None
+dropped = 0
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def trace(trace_id=None):
+    """Run the enclosed block under trace_id (a fresh one if not given)"""
+    token = trace_id_var.set(trace_id or new_trace_id())
+    try:
+        yield trace_id_var.get()
+    finally:
+        trace_id_var.reset(token)
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamp records with the current trace ID on the calling thread"""
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of sub-WARNING records; warnings and errors always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records are dropped when the queue is full"""
+
+    def enqueue(self, record):
+        global dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped += 1
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread; only merge args here
+        # so the record is safe to hand across threads.
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_text = logging.Formatter().formatException(record.exc_info) if record.exc_info else None
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'trace_id': getattr(record, 'trace_id', '-'),
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        extras = {k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS}
+        if extras:
+            text += ' ' + ' '.join(f'{k}={v}' for k, v in extras.items())
+        return text
+
+
+def configure(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Route the root logger through a bounded queue to a background writer"""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(TraceIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    for name in SAMPLED_LOGGERS:
+        logging.getLogger(name).addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
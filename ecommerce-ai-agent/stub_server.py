@@ -0,0 +1,460 @@
+"""Local stub e-commerce server for load and failure testing
+
+Serves search and product detail pages shaped like each platform in AVAILABLE_PLATFORMS so the
+scrapers can run end to end without touching real retailers. Point the app at
+it with ``STUB_BASE_URL=http://127.0.0.1:8900 python app.py``. It also
+answers ``POST /request`` like the Web Unlocker API, so escalation can be
+exercised locally with ``UNLOCKER_API_URL=http://127.0.0.1:8900/request``.
+
+Usage: python stub_server.py --port 8900 --latency 200 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# URL path prefix for each platform, as used by generate_search_url in stub mode
+PLATFORM_SLUGS = {
+    'Amazon': 'amazon',
+    'Flipkart': 'flipkart',
+    'Myntra': 'myntra',
+    'Meesho': 'meesho',
+    'Snapdeal': 'snapdeal',
+    'Ajio': 'ajio',
+    'Nykaa': 'nykaa',
+    'FirstCry': 'firstcry',
+    'ShopClues': 'shopclues',
+    'Paytm Mall': 'paytmmall',
+}
+SLUG_PLATFORMS = {slug: platform for platform, slug in PLATFORM_SLUGS.items()}
+
+# Query-string keys each platform uses for the search term
+QUERY_KEYS = ('k', 'q', 'keyword', 'text')
+
+# Product markup per platform, mirroring the selectors the scrapers look for
+PRODUCT_TEMPLATES = {
+    'Amazon': (
+        '<div data-component-type="s-search-result" data-asin="{sku}" data-index="{index}" class="s-result-item">'
+        '<h2><a class="a-link-normal" href="/dp/{sku}?ref=sr_1_{index}"><span>{title}</span></a></h2>'
+        '<span class="a-price"><span class="a-offscreen">&#8377;{price_fmt}</span>'
+        '<span class="a-price-whole">{price_fmt}</span></span>'
+        '<i class="a-icon-star"><span class="a-icon-alt">{rating} out of 5 stars</span></i>'
+        '<span>FREE delivery {delivery_day}</span></div>'
+    ),
+    'Flipkart': (
+        '<div class="_1AtVbE"><a class="_1fQZEK" href="/{slug_title}/p/itm{sku}?pid={sku}">'
+        '<div class="_4rR01T">{title}</div><div class="_30jeq3">&#8377;{price_fmt}</div>'
+        '<div class="_3LWZlK">{rating}</div><div class="_2TpdnF">Free delivery by {delivery_day}</div>'
+        '</a></div>'
+    ),
+    'Myntra': (
+        '<li class="product-base"><a href="/{slug_title}/{sku}/buy">'
+        '<h3 class="product-brand">{brand}</h3><h4 class="product-product">{title}</h4>'
+        '<div class="product-ratingsContainer"><span>{rating}</span></div>'
+        '<div class="product-price"><span class="product-discountedPrice">&#8377;{price_fmt}</span></div>'
+        '<div class="product-deliveryInfo">Delivery by {delivery_day}</div></a></li>'
+    ),
+    'Meesho': (
+        '<div class="ProductCard__BaseCard"><a href="/{slug_title}/product/{sku}">'
+        '<p>{title}</p><div class="ProductCard__Price">&#8377;{price_fmt}</div>'
+        '<div class="ProductCard__Rating">{rating}</div><span>Free delivery</span></a></div>'
+    ),
+    'Snapdeal': (
+        '<div class="product-tuple-listing" data-dp-id="{sku}"><a href="/product/{slug_title}/{sku}">'
+        '<p class="product-title">{title}</p></a><span class="product-price">Rs. {price_fmt}</span>'
+        '<div class="rating-stars"><div class="filled-stars" style="width:{rating_pct}%"></div></div>'
+        '<span>Free delivery by {delivery_day}</span></div>'
+    ),
+    'Ajio': (
+        '<div class="item rilrtl-products-list__item"><a href="/{slug_title}/p/{sku}">'
+        '<div class="nameCls">{title}</div><span class="price">&#8377;{price_fmt}</span>'
+        '<span class="rating">{rating}</span><span>Free delivery</span></a></div>'
+    ),
+    'Nykaa': (
+        '<div class="product-tag"><a href="/{slug_title}/p/{sku}">'
+        '<div class="css-name">{title}</div><span class="price">&#8377;{price_fmt}</span>'
+        '<div class="rating">{rating}</div><span>Free delivery on orders above &#8377;299</span></a></div>'
+    ),
+    'FirstCry': (
+        '<div class="list-prod"><a href="/{slug_title}/product/{sku}">'
+        '<span class="li_txt1">{title}</span></a><span class="price">&#8377;{price_fmt}</span>'
+        '<div class="rating">{rating}</div><span>Free shipping</span></div>'
+    ),
+    'ShopClues': (
+        '<div class="product"><a href="/product/{slug_title}-{sku}.html">'
+        '<h2>{title}</h2></a><span class="p_price">&#8377;{price_fmt}</span>'
+        '<div class="rating">{rating}</div><span>Free shipping</span></div>'
+    ),
+    'Paytm Mall': (
+        '<div class="_3Wh"><a href="/product/{slug_title}-{sku}-pdp">'
+        '<div class="UGUy">{title}</div></a><span class="_1kMS">{price_fmt}</span>'
+        '<div class="rating">{rating}</div><span>Free delivery</span></div>'
+    ),
+}
+
+CAPTCHA_PAGE = (
+    '<html><head><title>Robot Check</title></head><body>'
+    '<h4>Enter the characters you see below</h4>'
+    '<p>Sorry, we just need to make sure you\'re not a robot.</p>'
+    '<form action="/errors/validateCaptcha"><img src="/captcha/abc.jpg">'
+    '<input name="field-keywords"></form></body></html>'
+)
+
+SERVICE_UNAVAILABLE_PAGE = '<html><body><h1>503 Service Unavailable</h1></body></html>'
+
+# Inert markup that brings pages up to realistic search-page sizes
+FILLER_BLOCK = (
+    '<div class="nav-filler"><span class="a-size-base">Sponsored</span>'
+    '<ul><li><a href="/b?node=1">Category</a></li><li><a href="/b?node=2">Brand</a></li></ul>'
+    '<script>window.ueLogError=window.ueLogError||function(){};</script></div>'
+)
+
+# Embedded page state per platform, shaped like what each site ships for
+# client-side hydration: (script variable, builder taking the rendered items)
+PAGE_STATES = {
+    'Flipkart': ('window.__INITIAL_STATE__', lambda items: {'pageDataV4': {'page': {'data': {'10003': [
+        {'widget': {'data': {'products': [{'productInfo': {'value': {
+            'id': it['sku'],
+            'titles': {'title': it['title']},
+            'pricing': {'finalPrice': {'value': it['price']}, 'mrp': {'value': it['mrp']}},
+            'rating': {'average': it['rating'], 'count': 120},
+            'baseUrl': f"/{it['slug_title']}/p/itm{it['sku']}",
+        }}} for it in items]}}},
+    ]}}}}),
+    'Myntra': ('window.__myx', lambda items: {'searchData': {'results': {'products': [{
+        'productId': it['sku'],
+        'productName': it['title'],
+        'price': it['price'],
+        'mrp': it['mrp'],
+        'rating': it['rating'],
+        'landingPageUrl': f"{it['slug_title']}/{it['sku']}/buy",
+    } for it in items]}}}),
+    'Ajio': ('window.__PRELOADED_STATE__', lambda items: {'grid': {'entities': {it['sku']: {
+        'name': it['title'],
+        'price': {'value': it['price'], 'formattedValue': f"Rs. {it['price']:,}"},
+        'wasPriceData': {'value': it['mrp']},
+        'averageRating': it['rating'],
+        'url': f"/{it['slug_title']}/p/{it['sku']}",
+    } for it in items}}}),
+    'Nykaa': ('window.__PRELOADED_STATE__', lambda items: {'categoryListing': {'listingData': {'products': [{
+        'name': it['title'],
+        'offerPrice': it['price'],
+        'mrp': it['mrp'],
+        'rating': it['rating'],
+        'productURL': f"/{it['slug_title']}/p/{it['sku']}",
+    } for it in items]}}}),
+}
+
+DELIVERY_DAYS = ['Mon, 20 Oct', 'Tue, 21 Oct', 'Wed, 22 Oct', 'Thu, 23 Oct', 'Fri, 24 Oct']
+
+
+class StubConfig:
+    """Failure and latency knobs shared by all request handlers"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, captcha_rate=0.0,
+                 truncate_rate=0.0, products=12, filler_blocks=200, seed=None, unlocker_latency_ms=500.0,
+                 page_state=True, blocked_agents=()):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.truncate_rate = truncate_rate
+        self.products = products
+        self.filler_blocks = filler_blocks
+        self.unlocker_latency_ms = unlocker_latency_ms
+        self.page_state = page_state
+        # User-Agent substrings that always get a CAPTCHA, like a site flagging one browser fingerprint
+        self.blocked_agents = [agent.lower() for agent in blocked_agents]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'ok': 0, '503': 0, 'captcha': 0, 'truncated': 0, 'not_found': 0}
+
+    def roll(self):
+        """Pick an outcome and a delay for one request"""
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            r = self.rng.random()
+        if r < self.error_rate:
+            return '503', delay
+        r -= self.error_rate
+        if r < self.captcha_rate:
+            return 'captcha', delay
+        r -= self.captcha_rate
+        if r < self.truncate_rate:
+            return 'truncated', delay
+        return 'ok', delay
+
+    def count(self, outcome):
+        with self.lock:
+            self.counters['requests'] += 1
+            self.counters[outcome] = self.counters.get(outcome, 0) + 1
+
+
+def _seeded_int(*parts, low, high):
+    digest = hashlib.md5('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return low + int(digest[:8], 16) % (high - low + 1)
+
+
+def render_search_page(platform, query, products=12, filler_blocks=200, page=1, page_state=True):
+    """Render a deterministic search results page for platform and query"""
+    template = PRODUCT_TEMPLATES[platform]
+    words = query.split() or ['product']
+    items = []
+    state_items = []
+    for i in range(products):
+        index = (page - 1) * products + i
+        price = _seeded_int(platform, query, index, 'price', low=199, high=149999)
+        rating_tenths = _seeded_int(platform, query, index, 'rating', low=30, high=50)
+        sku = f'B0{_seeded_int(platform, query, index, "sku", low=10000000, high=99999999)}'
+        title = f'{words[0].title()} {" ".join(words[1:])} Variant {index + 1}'.strip()
+        state_items.append({
+            'sku': sku,
+            'title': title,
+            'slug_title': '-'.join(title.lower().split()),
+            'price': price,
+            'mrp': price + price // 4,
+            'rating': rating_tenths / 10,
+        })
+        items.append(template.format(
+            sku=sku,
+            index=index + 1,
+            title=html.escape(title),
+            slug_title='-'.join(title.lower().split()),
+            brand=html.escape(words[0].title()),
+            price_fmt=f'{price:,}',
+            rating=f'{rating_tenths / 10:.1f}',
+            rating_pct=rating_tenths * 2,
+            delivery_day=DELIVERY_DAYS[index % len(DELIVERY_DAYS)],
+        ))
+    filler = FILLER_BLOCK * filler_blocks
+    state = ''
+    if page_state and platform in PAGE_STATES:
+        variable, build = PAGE_STATES[platform]
+        payload = json.dumps(build(state_items)).replace('</', '<\\/')
+        state = f'<script>{variable} = {payload};</script>'
+    return (
+        f'<!DOCTYPE html><html><head><title>{html.escape(query)} - {platform}</title>{state}</head><body>'
+        f'{filler[:len(filler) // 2]}<div id="search-results">{"".join(items)}</div>'
+        f'{filler[len(filler) // 2:]}</body></html>'
+    )
+
+
+# Product detail paths, e.g. /dp/B0..., /slug/p/itm..., /slug/123/buy, /product/x.html
+DETAIL_PATH_RE = re.compile(r'(^|/)(dp|p|product)/|/buy$|\.html$')
+
+SELLERS = ['Appario Retail', 'RetailNet', 'Cloudtail India', 'SuperComNet', 'TrueComRetail']
+
+
+def render_detail_page(platform, path, filler_blocks=200):
+    """Render a deterministic product detail page; Amazon gets its own markup, others JSON-LD"""
+    rating_tenths = _seeded_int(platform, path, 'rating', low=30, high=50)
+    rating_count = _seeded_int(platform, path, 'count', low=12, high=48000)
+    delivery_day = DELIVERY_DAYS[_seeded_int(platform, path, 'day', low=0, high=len(DELIVERY_DAYS) - 1)]
+    in_stock = _seeded_int(platform, path, 'stock', low=0, high=9) > 0
+    seller = SELLERS[_seeded_int(platform, path, 'seller', low=0, high=len(SELLERS) - 1)]
+    if platform == 'Amazon':
+        body = (
+            f'<div id="acrPopover" title="{rating_tenths / 10:.1f} out of 5 stars"></div>'
+            f'<span id="acrCustomerReviewText">{rating_count:,} ratings</span>'
+            f'<div id="mir-layer-delivery-message">FREE delivery <b>{delivery_day}</b>. Details</div>'
+            f'<div id="availability"><span>{"In stock" if in_stock else "Currently unavailable."}</span></div>'
+            f'<div id="merchant-info">Ships from and sold by {seller}.</div>'
+        )
+    else:
+        ld = {
+            '@context': 'https://schema.org',
+            '@type': 'Product',
+            'aggregateRating': {'@type': 'AggregateRating', 'ratingValue': rating_tenths / 10, 'ratingCount': rating_count},
+            'offers': {
+                '@type': 'Offer',
+                'availability': 'https://schema.org/' + ('InStock' if in_stock else 'OutOfStock'),
+                'seller': {'@type': 'Organization', 'name': seller},
+            },
+        }
+        body = (
+            f'<script type="application/ld+json">{json.dumps(ld)}</script>'
+            f'<div class="delivery-info">Delivery by {delivery_day}</div>'
+        )
+    filler = FILLER_BLOCK * filler_blocks
+    return (
+        f'<!DOCTYPE html><html><head><title>{html.escape(path)} - {platform}</title></head><body>'
+        f'{filler[:len(filler) // 2]}<div id="dp">{body}</div>{filler[len(filler) // 2:]}</body></html>'
+    )
+
+
+def render_page(platform, parsed, rest, config):
+    """Detail page for product paths, search results page for everything else"""
+    if DETAIL_PATH_RE.search('/' + rest):
+        return render_detail_page(platform, '/' + rest, config.filler_blocks)
+    return render_search_page(platform, _query_from_request(parsed, rest), config.products, config.filler_blocks,
+                              page=_page_from_request(parsed), page_state=config.page_state)
+
+
+def _query_from_request(parsed, rest):
+    params = urllib.parse.parse_qs(parsed.query)
+    for key in QUERY_KEYS:
+        if key in params:
+            return params[key][0]
+    # Myntra encodes the query into the path: /myntra/iphone-15-pro
+    return urllib.parse.unquote_plus(rest).replace('-', ' ').strip('/ ')
+
+
+def _page_from_request(parsed):
+    params = urllib.parse.parse_qs(parsed.query)
+    for key in ('page', 'p', 'page_no'):
+        if key in params:
+            try:
+                return max(1, int(params[key][0]))
+            except ValueError:
+                pass
+    return 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'StubCommerce/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_length=None):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(content_length if content_length is not None else len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        """Connection warm-up probes: headers only, connection kept alive"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        """Web Unlocker stand-in: POST /request {"zone", "url"} returns the page, never blocked"""
+        config = self.server.config
+        if urllib.parse.urlparse(self.path).path != '/request':
+            self._send(404, '<html><body>Not found</body></html>')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            target = json.loads(self.rfile.read(length) or b'{}').get('url', '')
+        except (ValueError, AttributeError):
+            self._send(400, '<html><body>Bad request</body></html>')
+            return
+        parsed = urllib.parse.urlparse(target)
+        slug, _, rest = parsed.path.lstrip('/').partition('/')
+        platform = SLUG_PLATFORMS.get(slug)
+        if platform is None:
+            self._send(404, '<html><body>Not found</body></html>')
+            return
+        # Unlockers are slower than direct fetches but always get through
+        _, delay = config.roll()
+        time.sleep(delay + config.unlocker_latency_ms / 1000)
+        config.count('unlocked')
+        self._send(200, render_page(platform, parsed, rest, config))
+
+    def do_GET(self):
+        config = self.server.config
+        parsed = urllib.parse.urlparse(self.path)
+        slug, _, rest = parsed.path.lstrip('/').partition('/')
+
+        if slug == '__stats':
+            with config.lock:
+                counters = dict(config.counters)
+            self._send(200, repr(counters))
+            return
+
+        platform = SLUG_PLATFORMS.get(slug)
+        if platform is None:
+            config.count('not_found')
+            self._send(404, '<html><body>Not found</body></html>')
+            return
+
+        outcome, delay = config.roll()
+        user_agent = self.headers.get('User-Agent', '').lower()
+        if any(agent in user_agent for agent in config.blocked_agents):
+            outcome = 'captcha'
+        if delay:
+            time.sleep(delay)
+        config.count(outcome)
+
+        if outcome == '503':
+            self._send(503, SERVICE_UNAVAILABLE_PAGE)
+            return
+        if outcome == 'captcha':
+            self._send(200, CAPTCHA_PAGE)
+            return
+
+        body = render_page(platform, parsed, rest, config)
+        if outcome == 'truncated':
+            # Advertise the full length but close the connection halfway through
+            self.close_connection = True
+            full_length = len(body.encode('utf-8'))
+            self._send(200, body[:len(body) // 2], content_length=full_length)
+            return
+        self._send(200, body)
+
+
+def make_server(host='127.0.0.1', port=8900, config=None, verbose=False):
+    """Create (but do not start) a stub server bound to host:port"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    server.verbose = verbose
+    return server
+
+
+def start_in_background(host='127.0.0.1', port=0, config=None):
+    """Start a stub server on a daemon thread and return (server, base_url)"""
+    server = make_server(host, port, config)
+    thread = threading.Thread(target=server.serve_forever, name='stub-server', daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stub e-commerce server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean response latency in ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='latency jitter in ms (+/-)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help='fraction of CAPTCHA pages')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='fraction of truncated responses')
+    parser.add_argument('--unlocker-latency', type=float, default=500.0,
+                        help='extra latency in ms for POST /request (unlocker stand-in)')
+    parser.add_argument('--block-agent', action='append', default=[], metavar='SUBSTRING',
+                        help='always CAPTCHA requests whose User-Agent contains this (repeatable)')
+    parser.add_argument('--products', type=int, default=12, help='products per search page')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-page-state', action='store_true',
+                        help='omit embedded JSON page state, forcing the markup scrapers')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.captcha_rate,
+                        args.truncate_rate, args.products, seed=args.seed,
+                        unlocker_latency_ms=args.unlocker_latency, page_state=not args.no_page_state,
+                        blocked_agents=args.block_agent)
+    server = make_server(args.host, args.port, config, args.verbose)
+    print(f'Stub e-commerce server on http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""DNS caching and connection warm-up for the retailer hosts
+
+Without this the first searches after a deploy pay a DNS lookup and a TCP+TLS
+handshake per retailer. At startup every platform host is resolved into a
+process-wide DNS cache and a few keep-alive connections are opened into the
+direct backend's pool. A background thread then re-resolves hosts before
+their entries expire and re-opens connections to hosts that have been idle
+long enough for the retailer to have closed them.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib3.util.connection import allowed_gai_family
+
+import fetch_backends
+import rate_limit
+
+log = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') == '1'
+# Keep-alive connections opened per host
+WARMUP_CONNECTIONS = int(os.environ.get('WARMUP_CONNECTIONS', '2'))
+WARMUP_TIMEOUT = float(os.environ.get('WARMUP_TIMEOUT', '5'))
+# Hosts idle for longer than this get their connections re-opened; keep it
+# below the retailers' keep-alive timeouts
+WARMUP_INTERVAL = float(os.environ.get('WARMUP_INTERVAL', '60'))
+DNS_CACHE_TTL = float(os.environ.get('DNS_CACHE_TTL', '300'))
+
+_system_getaddrinfo = socket.getaddrinfo
+
+
+class DnsCache:
+    """getaddrinfo results for a fixed set of hosts, refreshed in the background
+
+    Lookups for other hosts go straight to the system resolver. If a refresh
+    fails the previous answer keeps being served rather than failing fetches.
+    """
+
+    def __init__(self, ttl=DNS_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hosts = set()
+        # getaddrinfo args -> (expires, result)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        if host not in self.hosts:
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return self._resolve(key, entry)
+
+    def _resolve(self, key, previous=None):
+        try:
+            result = _system_getaddrinfo(*key)
+        except socket.gaierror:
+            if previous is None:
+                raise
+            with self.lock:
+                self.stale += 1
+            log.warning("DNS refresh for %s failed, serving the cached answer", key[0])
+            return previous[1]
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    def add(self, host, port):
+        """Start caching host and resolve it the way urllib3 will"""
+        with self.lock:
+            self.hosts.add(host)
+        return self._resolve((host, port, allowed_gai_family(), socket.SOCK_STREAM, 0, 0))
+
+    def refresh(self, margin):
+        """Re-resolve entries expiring within margin seconds"""
+        now = time.monotonic()
+        with self.lock:
+            due = [(key, entry) for key, entry in self.entries.items() if entry[0] - now < margin]
+        for key, entry in due:
+            self._resolve(key, entry)
+
+    def install(self):
+        socket.getaddrinfo = self.getaddrinfo
+
+    def stats(self):
+        with self.lock:
+            return {'hosts': len(self.hosts), 'entries': len(self.entries),
+                    'hits': self.hits, 'misses': self.misses, 'stale': self.stale}
+
+
+dns_cache = DnsCache()
+
+
+class Warmer:
+    """Warms DNS and keep-alive connections for origins() on startup and periodically
+
+    origins() returns the base URLs fetches will go to (scheme://host[:port]);
+    headers() the request headers to send.
+    """
+
+    def __init__(self, origins, headers, connections=WARMUP_CONNECTIONS, interval=WARMUP_INTERVAL,
+                 timeout=WARMUP_TIMEOUT):
+        self.origins = origins
+        self.headers = headers
+        self.connections = connections
+        self.interval = interval
+        self.timeout = timeout
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_run = None
+
+    def _open(self, origin):
+        host = urllib.parse.urlsplit(origin).hostname
+        # Each connection costs the host a (cheap) request, so only use spare budget
+        if not rate_limit.limiter.try_acquire(host, reserve=rate_limit.HOST_BURST / 2):
+            return False
+        fetch_backends.warm_connection(origin + '/', self.headers(), self.timeout)
+        return True
+
+    def warm_origin(self, origin, idle_only=False):
+        """Resolve origin's host and open keep-alive connections to it; returns timings"""
+        parts = urllib.parse.urlsplit(origin)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        report = {}
+        start = time.perf_counter()
+        try:
+            dns_cache.add(parts.hostname, port)
+            report['dns_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        except socket.gaierror as e:
+            return {'error': f'DNS: {e}'}
+        if idle_only and fetch_backends.idle_seconds(parts.hostname) < self.interval:
+            # Real traffic is keeping these connections alive
+            return report
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.connections) as connectors:
+            opened = list(connectors.map(lambda _: self._try_open(origin), range(self.connections)))
+        report['connections'] = sum(opened)
+        report['connect_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return report
+
+    def _try_open(self, origin):
+        try:
+            return self._open(origin)
+        except Exception as e:
+            log.info("Warm-up connection to %s failed: %s", origin, e)
+            return False
+
+    def run_once(self, idle_only=False):
+        """Warm every origin in parallel; returns per-host timings"""
+        origins = sorted(set(self.origins()))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(origins), 1)) as warmers:
+            reports = dict(zip(origins, warmers.map(lambda o: self.warm_origin(o, idle_only), origins)))
+        self.last_run = {'seconds': round(time.perf_counter() - start, 2), 'hosts': reports}
+        return self.last_run
+
+    def warm(self):
+        """Blocking startup warm-up; logs how long it took"""
+        if not WARMUP_ENABLED:
+            return None
+        dns_cache.install()
+        report = self.run_once()
+        log.info("Warm-up finished in %.2fs", report['seconds'], extra=report)
+        return report
+
+    def _loop(self, warm_first):
+        if warm_first:
+            self.warm()
+        while not self.stop_event.wait(self.interval):
+            dns_cache.refresh(margin=self.interval * 2)
+            self.run_once(idle_only=True)
+
+    def start(self, wait=False):
+        """Warm up, then keep DNS and connections fresh, all on a background thread
+
+        wait=True runs the startup warm-up here before returning instead, for
+        worker startup hooks; never pass it from a request.
+        """
+        if self.thread is not None or not WARMUP_ENABLED:
+            return
+        if wait:
+            self.warm()
+        self.thread = threading.Thread(target=self._loop, args=(not wait,), name='warmup', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()